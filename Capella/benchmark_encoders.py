@@ -0,0 +1,36 @@
+from src.encoders import measure_accuracy_delta, ENCODER_BACKENDS
+from src.config import MODEL_NAME
+from datasets import load_dataset
+import json
+import sys
+
+NUM_TEXTS = 500  # Held-out AG News test articles used for the comparison
+OUTPUT_PATH = "encoder_benchmark.json"
+
+def main():
+    try:
+        backends = sys.argv[1:] or [backend for backend in ENCODER_BACKENDS if backend != "torch"]
+        texts = load_dataset("ag_news", split=f"test[:{NUM_TEXTS}]")["text"]
+        
+        results = []
+        for model_name in [MODEL_NAME]:
+            for backend in backends:
+                print(f"Benchmarking {model_name} on {backend}...")
+                result = measure_accuracy_delta(model_name, backend, texts)
+                results.append(result)
+                print(
+                    f"  cosine to fp32 mean={result['mean_cosine_to_fp32']:.4f} "
+                    f"min={result['min_cosine_to_fp32']:.4f}, "
+                    f"neighbor overlap@10={result['neighbor_overlap_at_10']:.3f}, "
+                    f"{result['backend_ms_per_text']:.2f}ms/text ({result['speedup']:.2f}x)"
+                )
+        
+        with open(OUTPUT_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {OUTPUT_PATH}")
+        
+    except Exception as e:
+        print(f"Error during benchmark: {e}")
+
+if __name__ == "__main__":
+    main()
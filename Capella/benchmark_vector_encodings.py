@@ -0,0 +1,138 @@
+from src.backends import create_manager
+from src.encoders import load_encoder
+from src.vector_codec import VectorCodec, VECTOR_ENCODINGS
+from src.ingestion import read_dataset
+from src.result_cache import result_cache
+from src.config import (
+    MODEL_NAME, BATCH_SIZE, NUM_SAMPLES, SEARCH_BACKEND, VECTOR_FIELD, VECTOR_INDEX, INGEST_BATCH_SIZE,
+    CAPELLA_BUCKET, CAPELLA_SCOPE, CAPELLA_COLLECTION
+)
+from couchbase.exceptions import SearchIndexNotFoundException
+from datasets import load_dataset
+import json
+import sys
+import time
+import numpy as np
+
+NUM_DOCS = 1000  # AG News training articles used to measure document size and codec cost
+NUM_QUERIES = 100  # AG News test titles used to measure query latency
+OUTPUT_PATH = "vector_encoding_benchmark.json"
+INDEX_WAIT_TIMEOUT = 600  # Seconds to wait for the search index to cover every article before giving up
+
+def measure_documents(codec: VectorCodec, texts, embeddings) -> dict:
+    """Average stored document size and per-vector encode/decode cost, measured locally"""
+    start_time = time.perf_counter()
+    vectors = codec.encode_batch(embeddings)
+    encode_time = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    decoded = np.stack([codec.decode(vector) for vector in vectors])
+    decode_time = time.perf_counter() - start_time
+    
+    sizes = []
+    for text, vector in zip(texts, vectors):
+        title, _, content = text.partition("\n")
+        doc = {"id": "article_0", "type": "article", "title": title, "content": content or text, "category": 0, VECTOR_FIELD: vector}
+        sizes.append(len(json.dumps(doc).encode("utf-8")))
+    
+    return {
+        "mean_document_bytes": float(np.mean(sizes)),
+        "mean_vector_bytes": float(np.mean([len(json.dumps(vector)) for vector in vectors])),
+        "encode_us_per_vector": encode_time * 1e6 / len(vectors),
+        "decode_us_per_vector": decode_time * 1e6 / len(vectors),
+        "max_abs_error": float(np.abs(decoded - embeddings).max())
+    }
+
+def wait_for_search_index(manager):
+    """Block until the vector search index has indexed every stored article"""
+    expected = list(manager.cluster.query(
+        f"SELECT RAW COUNT(*) FROM `{CAPELLA_BUCKET}`.`{CAPELLA_SCOPE}`.`{CAPELLA_COLLECTION}` WHERE type = 'article'"
+    ))[0]
+    
+    deadline = time.monotonic() + INDEX_WAIT_TIMEOUT
+    while True:
+        try:
+            indexed = manager.scope.search_indexes().get_indexed_documents_count(VECTOR_INDEX)
+        except SearchIndexNotFoundException:
+            # The upsert in setup_database may not be visible yet
+            indexed = 0
+        if indexed >= expected:
+            return
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{VECTOR_INDEX} indexed {indexed} of {expected} articles within {INDEX_WAIT_TIMEOUT}s")
+        time.sleep(1)
+
+def warm_embedding_store(manager) -> int:
+    """Store the embedding of every article the ingest will write, returning how many there are"""
+    num_docs = 0
+    for offset, rows in read_dataset("ag_news", "train", NUM_SAMPLES, INGEST_BATCH_SIZE):
+        manager._embed_batch(manager._parse_batch(rows, offset), offset)
+        num_docs += len(rows)
+    return num_docs
+
+def measure_cluster(encoding: str, queries) -> dict:
+    """Re-ingest NUM_SAMPLES articles with the encoding, then time queries in both search modes"""
+    manager = create_manager(vector_encoding=encoding)
+    manager.setup_database()
+    
+    # Only the first encoding would otherwise pay for model encoding, so every timed ingest starts from a warm store
+    num_docs = warm_embedding_store(manager)
+    start_time = time.perf_counter()
+    manager.load_dataset(resume=False)
+    ingest_time = time.perf_counter() - start_time
+    
+    result = {"ingest_docs_per_second": num_docs / ingest_time}
+    
+    # The search index rebuilds in the background after setup, and KNN queries against it would fall back to scan
+    wait_for_search_index(manager)
+    
+    for mode in ("scan", "knn"):
+        latencies, fallbacks = [], 0
+        for query in queries:
+            # Query embeddings are cached after the first pass, so only the database request is compared
+            _, timings, used_mode = manager.vector_search(query, 5, mode, fields=[])
+            latencies.append(timings["db_request"] * 1000)
+            fallbacks += used_mode != mode
+        if fallbacks:
+            raise RuntimeError(f"{fallbacks} of {len(queries)} {mode} queries fell back to another mode")
+        result[f"{mode}_p50_ms"] = float(np.percentile(latencies, 50))
+        result[f"{mode}_p95_ms"] = float(np.percentile(latencies, 95))
+    return result
+
+def main():
+    try:
+        encodings = sys.argv[1:] or VECTOR_ENCODINGS
+        
+        # Every timed query must reach the database
+        result_cache.max_size = 0
+        texts = load_dataset("ag_news", split=f"train[:{NUM_DOCS}]")["text"]
+        queries = [text.split("\n", 1)[0] for text in load_dataset("ag_news", split=f"test[:{NUM_QUERIES}]")["text"]]
+        embeddings = np.asarray(load_encoder(MODEL_NAME).encode(texts, batch_size=BATCH_SIZE), dtype=np.float32)
+        
+        results = []
+        for encoding in encodings:
+            codec = VectorCodec(encoding)
+            result = {"encoding": encoding, **measure_documents(codec, texts, embeddings)}
+            print(
+                f"{encoding}: {result['mean_document_bytes']:.0f} bytes/doc "
+                f"({result['mean_vector_bytes']:.0f} for the vector), max error {result['max_abs_error']:.2e}"
+            )
+            
+            # Ingest rate and query latency need a cluster that can search the encoding
+            if SEARCH_BACKEND == "capella" and codec.server_searchable:
+                result.update(measure_cluster(encoding, queries))
+                print(
+                    f"  ingest {result['ingest_docs_per_second']:.1f} docs/s, "
+                    f"scan p50 {result['scan_p50_ms']:.2f}ms, knn p50 {result['knn_p50_ms']:.2f}ms"
+                )
+            results.append(result)
+        
+        with open(OUTPUT_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {OUTPUT_PATH}")
+        
+    except Exception as e:
+        print(f"Error during benchmark: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from src.backends import create_manager
+from src.ground_truth import exact_knn, recall_at_k
+from src.local_index import LocalVectorIndex
+from src.result_cache import result_cache
+from src.config import GROUND_TRUTH_INDEX_PATH, BATCH_SIZE
+from datasets import load_dataset
+import json
+import sys
+import time
+
+NUM_QUERIES = 200  # AG News test titles used as queries
+K = 10  # Recall is reported at this depth
+OUTPUT_PATH = "recall_report.json"
+
+def main():
+    try:
+        modes = sys.argv[1:] or ["scan", "knn"]
+        manager = create_manager()
+        
+        # Recall is measured for the index itself, so near-duplicate queries must not be answered from cache
+        result_cache.max_size = 0
+        
+        # Reference embeddings come from the local index snapshot of the same dataset
+        reference = LocalVectorIndex.load(GROUND_TRUTH_INDEX_PATH)
+        queries = [text.split("\n", 1)[0] for text in load_dataset("ag_news", split=f"test[:{NUM_QUERIES}]")["text"]]
+        query_embeddings = manager.model.encode(queries, batch_size=BATCH_SIZE)
+        
+        start_time = time.time()
+        rows, _ = exact_knn(reference.vectors, query_embeddings, K)
+        ground_truth_time = time.time() - start_time
+        true_ids = [[reference.ids[row] for row in query_rows] for query_rows in rows]
+        print(f"Exact kNN over {len(reference)} vectors for {len(queries)} queries took {ground_truth_time:.2f}s")
+        
+        report = {"num_vectors": len(reference), "num_queries": len(queries), "k": K, "modes": {}}
+        for mode in modes:
+            batch_results, _ = manager.vector_search_batch(queries, K, mode, fields=[])
+            fallbacks = sum(used_mode != mode for _, _, used_mode in batch_results)
+            if fallbacks:
+                raise RuntimeError(f"{fallbacks} {mode} searches fell back to another mode; wait for the search index and rerun")
+            retrieved_ids = [[result["id"] for result in results] for results, _, _ in batch_results]
+            recall = recall_at_k(retrieved_ids, true_ids, K)
+            search_ms = 1000 * sum(timings["db_request"] for _, timings, _ in batch_results) / len(batch_results)
+            report["modes"][mode] = {"recall": recall, "mean_search_time_ms": search_ms}
+            print(f"{mode}: recall@{K}={recall:.4f}, mean search time {search_ms:.2f}ms")
+        
+        with open(OUTPUT_PATH, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {OUTPUT_PATH}")
+        
+    except Exception as e:
+        print(f"Error during recall evaluation: {e}")
+
+if __name__ == "__main__":
+    main()
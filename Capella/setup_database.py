@@ -1,4 +1,4 @@
-from src.couchbase_manager import CouchbaseManager
+from src.backends import create_manager
 import time
 
 def main():
@@ -7,7 +7,7 @@ def main():
         start_time = time.time()
         
         # Initialize manager
-        manager = CouchbaseManager()
+        manager = create_manager()
         
         # Setup database
         manager.setup_database()
@@ -1,45 +1,292 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Literal, Optional
+import json
 import time
-from .couchbase_manager import CouchbaseManager
+from .backends import create_manager
+from .embedding_cache import query_embedding_cache
+from .result_cache import result_cache
+from .limiter import search_limiter, SearchQueueFull
+from .loader import ManagerLoader, ManagerNotReady
+from .ground_truth import recall_estimator
+from .metrics import stage_metrics, stage_timer
+from .config import MAX_BATCH_QUERIES, DEFAULT_SEARCH_MODE
 
 app = FastAPI(title="Couchbase Vector Search Demo")
 
-# Initialize Couchbase manager
-manager = CouchbaseManager()
+# Load the manager for the configured backend in the background so the port binds immediately
+loader = ManagerLoader(create_manager)
+
+@app.on_event("startup")
+async def start_manager_loading():
+    loader.start()
+
+# Document fields a client can project; id and distance are always returned
+ResultField = Literal["title", "content", "category"]
+
+# Exact-match filters pushed down to the database; fields left unset do not filter
+class SearchFilters(BaseModel):
+    category: Optional[int] = None
+    source: Optional[str] = None
 
 class SearchRequest(BaseModel):
     query: str
     limit: int = 5
+    mode: Literal["scan", "knn"] = DEFAULT_SEARCH_MODE
+    fields: Optional[List[ResultField]] = None
+    filters: Optional[SearchFilters] = None
 
 class SearchResponse(BaseModel):
     results: List[Dict[str, Any]]
     metrics: Dict[str, Any]
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    limit: int = 5
+    mode: Literal["scan", "knn"] = DEFAULT_SEARCH_MODE
+    fields: Optional[List[ResultField]] = None
+    filters: Optional[SearchFilters] = None
+
+class BatchSearchResponse(BaseModel):
+    responses: List[SearchResponse]
+    metrics: Dict[str, Any]
+
+class DocumentsRequest(BaseModel):
+    ids: List[str]
+    fields: Optional[List[ResultField]] = None
+
+class DocumentsResponse(BaseModel):
+    documents: List[Dict[str, Any]]
+
+def filter_values(filters: Optional[SearchFilters]) -> Dict[str, Any]:
+    """Return only the filters a request actually set"""
+    return filters.dict(exclude_none=True) if filters is not None else {}
+
+def timed_response(endpoint: str, response: BaseModel, timings: Dict[str, float], start_time: float) -> JSONResponse:
+    """Serialize a response and record its stage timings, including serialization and the total"""
+    with stage_timer(timings, "serialize"):
+        content = jsonable_encoder(response)
+    
+    # Encoding the results dominates; only rendering the final bytes is left out of the reported time
+    content["metrics"]["serialize_time_ms"] = timings["serialize"] * 1000
+    with stage_timer(timings, "serialize"):
+        json_response = JSONResponse(content=content)
+    timings["total"] = time.perf_counter() - start_time
+    stage_metrics.observe(endpoint, timings)
+    return json_response
+
+# Stage timings are reported in stream frames under the same names as in JSON responses
+STAGE_METRIC_NAMES = {
+    "encode": "embedding_time_ms", "cache": "cache_time_ms",
+    "db_request": "search_time_ms", "materialize": "materialize_time_ms"
+}
+
+def streaming_response(
+    endpoint: str, http_request: Request, frames: AsyncIterator[Dict[str, Any]], start_time: float
+) -> StreamingResponse:
+    """Stream frames as NDJSON, or as server-sent events when the client accepts text/event-stream"""
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        media_type = "text/event-stream"
+        encode = lambda frame: f"event: {frame['event']}\ndata: {json.dumps(frame, default=str)}\n\n"
+    else:
+        media_type = "application/x-ndjson"
+        encode = lambda frame: json.dumps(frame, default=str) + "\n"
+    
+    async def body():
+        timings = {}
+        try:
+            async for frame in frames:
+                frame_timings = frame.pop("timings", {})
+                if frame["event"] == "response":
+                    # Each query of a batch is recorded on its own, like the batch endpoint
+                    stage_metrics.observe(endpoint, frame_timings)
+                else:
+                    timings.update(frame_timings)
+                
+                if frame_timings or frame["event"] == "summary":
+                    frame["metrics"] = {
+                        STAGE_METRIC_NAMES[stage]: seconds * 1000
+                        for stage, seconds in frame_timings.items() if stage in STAGE_METRIC_NAMES
+                    }
+                if frame["event"] == "summary":
+                    frame["metrics"]["first_result_time_ms"] = timings.get("first_result", 0.0) * 1000
+                    frame["metrics"]["total_time_ms"] = (time.perf_counter() - start_time) * 1000
+                elif "first_result" not in timings:
+                    timings["first_result"] = time.perf_counter() - start_time
+                
+                with stage_timer(timings, "serialize"):
+                    chunk = encode(frame)
+                yield chunk
+        except Exception as e:
+            # The status line has already been sent, so failures are reported in-band
+            yield encode({"event": "error", "detail": str(e)})
+            return
+        
+        timings["total"] = time.perf_counter() - start_time
+        stage_metrics.observe(endpoint, timings)
+    
+    return StreamingResponse(body(), media_type=media_type)
+
 @app.post("/search/vector", response_model=SearchResponse)
 async def vector_search(request: SearchRequest):
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
+        
+        # Perform search off the event loop
+        results, timings, search_mode = await search_limiter.run(
+            loader.get().vector_search, request.query, request.limit, request.mode,
+            fields=request.fields, filters=filter_values(request.filters)
+        )
         
-        # Perform search
-        results, search_time = manager.vector_search(request.query, request.limit)
+        total_time = time.perf_counter() - start_time
         
-        total_time = time.time() - start_time
+        # Whatever the stages do not account for was spent waiting for a search slot
+        timings["queue"] = max(0.0, total_time - sum(timings.values()))
         
         # Calculate metrics
         metrics = {
             "total_time_ms": total_time * 1000,
-            "search_time_ms": search_time * 1000,
-            "network_time_ms": (total_time - search_time) * 1000,
-            "num_results": len(results)
+            "embedding_time_ms": timings["encode"] * 1000,
+            "cache_time_ms": timings.get("cache", 0.0) * 1000,
+            "search_time_ms": timings.get("db_request", 0.0) * 1000,
+            "materialize_time_ms": timings.get("materialize", 0.0) * 1000,
+            "queue_time_ms": timings["queue"] * 1000,
+            "cache_hit": "db_request" not in timings,
+            "num_results": len(results),
+            "recall": recall_estimator.estimate(),
+            "search_mode": search_mode
+        }
+        
+        return timed_response("/search/vector", SearchResponse(results=results, metrics=metrics), timings, start_time)
+    
+    except (SearchQueueFull, ManagerNotReady) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/search/vector/batch", response_model=BatchSearchResponse)
+async def vector_search_batch(request: BatchSearchRequest):
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_QUERIES} queries are allowed per batch"
+        )
+    
+    try:
+        start_time = time.perf_counter()
+        
+        # Encode all queries at once and run their searches concurrently
+        batch_results, encode_time = await search_limiter.run(
+            loader.get().vector_search_batch, request.queries, request.limit, request.mode,
+            fields=request.fields, filters=filter_values(request.filters)
+        )
+        
+        responses = []
+        for results, timings, search_mode in batch_results:
+            stage_metrics.observe("/search/vector/batch", timings)
+            responses.append(SearchResponse(
+                results=results,
+                metrics={
+                    "search_time_ms": timings.get("db_request", 0.0) * 1000,
+                    "materialize_time_ms": timings.get("materialize", 0.0) * 1000,
+                    "num_results": len(results),
+                    "cache_hit": "db_request" not in timings,
+                    "search_mode": search_mode
+                }
+            ))
+        
+        total_time = time.perf_counter() - start_time
+        
+        # Calculate batch metrics
+        metrics = {
+            "total_time_ms": total_time * 1000,
+            "embedding_time_ms": encode_time * 1000,
+            "num_queries": len(request.queries)
         }
         
-        return SearchResponse(results=results, metrics=metrics)
+        return timed_response(
+            "/search/vector/batch", BatchSearchResponse(responses=responses, metrics=metrics),
+            {"encode": encode_time}, start_time
+        )
     
+    except (SearchQueueFull, ManagerNotReady) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/search/vector/stream")
+async def vector_search_stream(request: SearchRequest, http_request: Request):
+    try:
+        start_time = time.perf_counter()
+        
+        # Results are sent as soon as they are ready, followed by a summary frame
+        frames = search_limiter.stream(
+            loader.get().vector_search_stream, request.query, request.limit, request.mode,
+            fields=request.fields, filters=filter_values(request.filters)
+        )
+        return streaming_response("/search/vector/stream", http_request, frames, start_time)
+    
+    except (SearchQueueFull, ManagerNotReady) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+@app.post("/search/vector/batch/stream")
+async def vector_search_batch_stream(request: BatchSearchRequest, http_request: Request):
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_QUERIES} queries are allowed per batch"
+        )
+    
+    try:
+        start_time = time.perf_counter()
+        
+        # Each query's results are sent as soon as its search finishes, in completion order
+        frames = search_limiter.stream(
+            loader.get().vector_search_batch_stream, request.queries, request.limit, request.mode,
+            fields=request.fields, filters=filter_values(request.filters)
+        )
+        return streaming_response("/search/vector/batch/stream", http_request, frames, start_time)
+    
+    except (SearchQueueFull, ManagerNotReady) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+@app.post("/documents", response_model=DocumentsResponse)
+async def get_documents(request: DocumentsRequest):
+    if len(request.ids) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_QUERIES} ids are allowed per request"
+        )
+    
+    try:
+        # Hydrate results lazily with a single multi-get
+        documents = await search_limiter.run(loader.get().get_documents, request.ids, request.fields)
+        return DocumentsResponse(documents=documents)
+    
+    except (SearchQueueFull, ManagerNotReady) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "embedding_cache": query_embedding_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "search_limiter": search_limiter.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(stage_metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    status = loader.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status) 
\ No newline at end of file
@@ -15,7 +15,7 @@ def format_metrics(metrics: Dict[str, Any]) -> None:
     with col2:
         st.metric("Search Time", f"{metrics['search_time_ms']:.2f}ms")
     with col3:
-        st.metric("Network Time", f"{metrics['network_time_ms']:.2f}ms")
+        st.metric("Queue Time", f"{metrics.get('queue_time_ms', 0.0):.2f}ms")
 
 def display_result(result: Dict[str, Any]) -> None:
     """Display a single search result"""
@@ -48,6 +48,16 @@ def main():
         max_value=20,
         value=5
     )
+    search_mode = st.sidebar.selectbox(
+        "Search Mode",
+        options=["scan", "knn"],
+        format_func=lambda x: "Full Scan (SQL++)" if x == "scan" else "Vector Index (KNN)"
+    )
+    category = st.sidebar.selectbox(
+        "Category",
+        options=[None, 0, 1, 2, 3],
+        format_func=lambda x: "All" if x is None else ["World", "Sports", "Business", "Sci/Tech"][x]
+    )
     
     # Main search interface
     query = st.text_input("Enter your search query")
@@ -57,7 +67,13 @@ def main():
             with st.spinner("Searching..."):
                 response = requests.post(
                     f"{API_URL}/search/vector",
-                    json={"query": query, "limit": num_results}
+                    json={
+                        "query": query,
+                        "limit": num_results,
+                        "mode": search_mode,
+                        # The filter is applied by the database, not to the returned results
+                        "filters": {"category": category} if category is not None else None
+                    }
                 )
                 response.raise_for_status()
                 data = response.json()
@@ -0,0 +1,11 @@
+from .config import SEARCH_BACKEND
+
+def create_manager(**kwargs):
+    """Create the search manager for the configured SEARCH_BACKEND, passing kwargs to its constructor"""
+    if SEARCH_BACKEND == "local":
+        from .local_manager import LocalManager
+        return LocalManager(**kwargs)
+    if SEARCH_BACKEND == "capella":
+        from .couchbase_manager import CouchbaseManager
+        return CouchbaseManager(**kwargs)
+    raise ValueError(f"Unknown search backend: {SEARCH_BACKEND}")
@@ -11,14 +11,65 @@ CAPELLA_BUCKET = "vector_search_demo"
 CAPELLA_SCOPE = "news"
 CAPELLA_COLLECTION = "articles"
 
+# Backend Configuration
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "capella")  # "capella" or "local"
+LOCAL_INDEX_PATH = ".local_index"  # Directory the local index is saved to
+LOCAL_NPROBE = 8  # IVF lists probed per query by the local "knn" mode
+
+# Recall Measurement Configuration
+GROUND_TRUTH_INDEX_PATH = LOCAL_INDEX_PATH  # Local index snapshot holding the reference embeddings
+GROUND_TRUTH_CHUNK_SIZE = 65536  # Reference vectors scored per step of the exact kNN scan
+RECALL_SAMPLE_RATE = 0.0  # Fraction of live queries checked against exact kNN (0 disables)
+
 # Vector Search Configuration
 VECTOR_DIM = 384  # Using all-MiniLM-L6-v2 for simplicity
 MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
 
+# Encoder Backend Configuration
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")  # "torch", "int8", "onnx" or "onnx_int8"
+ENCODER_EXPORT_DIR = ".encoders"  # Where quantized ONNX exports are written
+ONNX_QUANTIZATION_CONFIG = "avx512_vnni"  # "arm64", "avx2", "avx512" or "avx512_vnni"
+ENCODE_WORKERS = int(os.getenv("ENCODE_WORKERS", "0"))  # Ingestion encoding processes, one model copy each; 0 encodes in-process
+ENCODE_CHUNK_SIZE = 32  # Texts sent to an encoding process per task
+
 # Dataset Configuration
-NUM_SAMPLES = 1000  # Number of articles to load
+NUM_SAMPLES = 1000  # Number of articles to load; None ingests the full split
 BATCH_SIZE = 100  # Batch size for insertions
+EMBEDDING_STORE_DIR = ".embedding_store"  # Local memory-mapped cache of document embeddings
+
+# Ingestion Pipeline Configuration
+INGEST_STREAMING = True  # Stream the dataset from the hub instead of downloading the whole split first
+INGEST_BATCH_SIZE = max(BATCH_SIZE, ENCODE_WORKERS * ENCODE_CHUNK_SIZE)  # Rows per pipeline batch, enough to give every encoding process a chunk
+INGEST_QUEUE_SIZE = 4  # Batches buffered between pipeline stages, which bounds ingestion memory
+INGEST_CHECKPOINT_PATH = ".ingest_checkpoint.json"  # Rows written so far, used to resume an interrupted ingest
 
 # Search Configuration
 VECTOR_FIELD = "embedding"
-VECTOR_INDEX = "news_vector_index" 
\ No newline at end of file
+VECTOR_INDEX = "news_vector_index"
+VECTOR_ENCODING = os.getenv("VECTOR_ENCODING", "float")  # "float" JSON list, "base64_f32", "base64_f16" or "int8"
+VECTOR_INT8_MAX_ABS = 0.5  # Component magnitude mapped to +/-127 by the int8 encoding; larger values are clipped
+VECTOR_SIMILARITY = "l2_norm"  # Similarity of the vector search index created by setup_database
+RESULT_FIELDS = ["title", "content", "category"]  # Document fields returned when no projection is given
+DEFAULT_SEARCH_MODE = "scan"  # "scan" SQL++ full scan or "knn" through VECTOR_INDEX
+FILTER_FIELDS = ["category", "source"]  # Document fields searches can be filtered on by exact match
+FILTER_INDEX = "article_filter"  # Prefix of the secondary index created on each of FILTER_FIELDS
+SEARCH_WORKERS = 8  # Concurrent queries issued by batch search 
+
+# Query Embedding Cache Configuration
+EMBEDDING_CACHE_SIZE = 10000  # Maximum number of cached query embeddings
+EMBEDDING_CACHE_TTL = 3600  # Seconds before a cached embedding expires
+
+# Result Cache Configuration
+RESULT_CACHE_SIZE = 10000  # Maximum number of cached result lists (0 disables the cache)
+RESULT_CACHE_TTL = 300  # Seconds before cached results expire
+RESULT_CACHE_THRESHOLD = 0.98  # Cosine similarity at which a cached query's results are reused (1.0 for exact repeats only)
+RESULT_CACHE_VERSION_PATH = ".result_cache_version"  # Touched after ingestion so running APIs drop stale results
+
+# API Concurrency Configuration
+MAX_CONCURRENT_SEARCHES = 8  # Searches executed at once in the worker thread pool
+MAX_QUEUED_SEARCHES = 64  # Requests allowed to wait for a slot before returning 503
+MAX_BATCH_QUERIES = 1000  # Largest query list accepted by the batch search endpoint
+WARMUP_ON_STARTUP = True  # Run a dummy encode before reporting ready
+
+# Latency Metrics Configuration
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]  # Histogram upper bounds in seconds
\ No newline at end of file
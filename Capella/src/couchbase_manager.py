@@ -1,16 +1,33 @@
 from couchbase.cluster import Cluster, ClusterOptions
 from couchbase.auth import PasswordAuthenticator
-from couchbase.options import QueryOptions
+from couchbase.exceptions import QueryIndexNotFoundException, SearchIndexNotFoundException
+from couchbase.options import QueryOptions, SearchOptions
+from couchbase.search import SearchQuery, SearchRequest, ConjunctionQuery, NumericRangeQuery, TermQuery
+from couchbase.vector_search import VectorQuery, VectorSearch
 from couchbase.management.queries import CreateQueryIndexOptions
-from sentence_transformers import SentenceTransformer
-from datasets import load_dataset
-from typing import List, Dict, Any
-import time
+from couchbase.management.search import SearchIndex
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional
 import json
+import math
 from .config import *
+from .embedding_cache import query_embedding_cache
+from .embedding_store import EmbeddingStore
+from .encoders import load_encoder
+from .encode_pool import EncodePool
+from .vector_codec import VectorCodec
+from .ground_truth import recall_estimator
+from .result_cache import result_cache
+from .ingestion import IngestCheckpoint, read_dataset, run_pipeline
+from .metrics import stage_timer
 
 class CouchbaseManager:
-    def __init__(self):
+    def __init__(self, vector_encoding: str = VECTOR_ENCODING):
+        # Stored vector format, shared by ingestion, the search index and both search modes
+        self.codec = VectorCodec(vector_encoding)
+        if not self.codec.server_searchable:
+            raise ValueError(f"Couchbase cannot search {vector_encoding} vectors; it is only usable with the local backend")
+        
         # Initialize connection
         auth = PasswordAuthenticator(CAPELLA_USERNAME, CAPELLA_PASSWORD)
         self.cluster = Cluster(
@@ -23,8 +40,21 @@ class CouchbaseManager:
         self.scope = self.bucket.scope(CAPELLA_SCOPE)
         self.collection = self.scope.collection(CAPELLA_COLLECTION)
         
-        # Initialize embedding model
-        self.model = SentenceTransformer(MODEL_NAME)
+        # Initialize embedding model on the configured inference backend
+        self.model = load_encoder(MODEL_NAME)
+        
+        # Persistent document embeddings reused across ingestion runs
+        self.embedding_store = EmbeddingStore(MODEL_NAME, VECTOR_DIM)
+        
+        # Thread pool used to issue batched queries concurrently
+        self.search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS)
+        
+        # Process pool that shards ingestion encoding across cores, started by load_dataset
+        self.encode_pool = None
+    
+    def warmup(self):
+        """Run a dummy encode so the first query does not pay for lazy initialization"""
+        self.model.encode(["warm up"], batch_size=1)
     
     def setup_database(self):
         """Setup database with required indexes"""
@@ -35,83 +65,390 @@ class CouchbaseManager:
         """
         self.cluster.query(query).execute()
         
-        # Vector search index is assumed to be already created in Capella UI
+        # One secondary index per filter field, so a filtered scan reads only the matching articles
+        for field in FILTER_FIELDS:
+            query = f"""
+            CREATE INDEX IF NOT EXISTS `{FILTER_INDEX}_{field}`
+            ON `{CAPELLA_BUCKET}`.`{CAPELLA_SCOPE}`.`{CAPELLA_COLLECTION}`({field})
+            WHERE type = 'article'
+            """
+            self.cluster.query(query).execute()
+        
+        # Keep the vector search index in step with the stored vector encoding
+        try:
+            self.scope.search_indexes().upsert_index(self._search_index_definition())
+        except Exception as e:
+            print(f"Could not create or update search index {VECTOR_INDEX}, keeping the existing one: {e}")
         print("Database setup completed")
     
-    def load_dataset(self):
-        """Load and process AG News dataset"""
-        print(f"Loading {NUM_SAMPLES} samples from AG News dataset...")
-        dataset = load_dataset("ag_news", split=f"train[:{NUM_SAMPLES}]")
-        
-        # Process in batches
-        for i in range(0, len(dataset), BATCH_SIZE):
-            batch = dataset[i:i + BATCH_SIZE]
-            batch_docs = []
+    def _search_index_definition(self) -> SearchIndex:
+        """Vector search index over the stored vectors, storing the result fields so KNN rows need no fetch"""
+        text_field = lambda name: {"name": name, "type": "text", "index": True, "store": True}
+        properties = {
+            VECTOR_FIELD: {"enabled": True, "dynamic": False, "fields": [{
+                "name": VECTOR_FIELD,
+                "type": self.codec.index_field_type(),
+                "dims": VECTOR_DIM,
+                "similarity": VECTOR_SIMILARITY,
+                "index": True
+            }]},
+            "title": {"enabled": True, "dynamic": False, "fields": [text_field("title")]},
+            "content": {"enabled": True, "dynamic": False, "fields": [text_field("content")]},
+            "category": {"enabled": True, "dynamic": False, "fields": [
+                {"name": "category", "type": "number", "index": True, "store": True}
+            ]},
+            # Exact-match field for source prefilters
+            "source": {"enabled": True, "dynamic": False, "fields": [
+                {"name": "source", "type": "text", "analyzer": "keyword", "index": True}
+            ]}
+        }
+        return SearchIndex(
+            name=VECTOR_INDEX,
+            source_name=CAPELLA_BUCKET,
+            params={
+                "doc_config": {"mode": "scope.collection.type_field", "type_field": "type"},
+                "mapping": {
+                    "default_mapping": {"enabled": False},
+                    "types": {
+                        f"{CAPELLA_SCOPE}.{CAPELLA_COLLECTION}.article": {
+                            "enabled": True, "dynamic": False, "properties": properties
+                        }
+                    }
+                },
+                "store": {"indexType": "scorch"}
+            }
+        )
+    
+    def _parse_batch(self, rows: List[Dict[str, Any]], offset: int) -> Dict[str, Dict[str, Any]]:
+        """Split one batch of dataset rows into article documents keyed by id"""
+        docs = {}
+        for j, row in enumerate(rows):
+            # Split into title and content
+            text = row["text"]
+            title = text.split("\n", 1)[0]
+            content = text.split("\n", 1)[1] if "\n" in text else text
             
-            for j, item in enumerate(batch):
-                # Split into title and content
-                text = item["text"]
-                title = text.split("\n", 1)[0]
-                content = text.split("\n", 1)[1] if "\n" in text else text
-                
-                # Generate embedding from title + content
-                embedding = self.model.encode(f"{title} {content}").tolist()
-                
-                # Create document
-                doc = {
-                    "id": f"article_{i+j}",
-                    "type": "article",
-                    "title": title,
-                    "content": content,
-                    "category": item["label"],
-                    "embedding": embedding
+            doc_id = f"article_{offset + j}"
+            docs[doc_id] = {
+                "id": doc_id,
+                "type": "article",
+                "title": title,
+                "content": content,
+                "category": row["label"],
+                "source": "ag_news"
+            }
+        return docs
+    
+    def _embed_batch(self, docs: Dict[str, Dict[str, Any]], offset: int) -> Dict[str, Dict[str, Any]]:
+        """Add embeddings of title + content, encoding only unseen text in a single model call"""
+        embeddings = self.embedding_store.encode(
+            [f"{doc['title']} {doc['content']}" for doc in docs.values()],
+            self._encode_documents
+        )
+        for doc, vector in zip(docs.values(), self.codec.encode_batch(embeddings)):
+            doc[VECTOR_FIELD] = vector
+        return docs
+    
+    def _encode_documents(self, texts: List[str]):
+        """Encode document texts on the process pool when there is one, otherwise in-process"""
+        if self.encode_pool is not None:
+            return self.encode_pool.encode(MODEL_NAME, texts)
+        return self.model.encode(texts, batch_size=BATCH_SIZE)
+    
+    def _write_batch(self, docs: Dict[str, Dict[str, Any]], offset: int):
+        """Write one batch of documents with a single multi-document upsert"""
+        result = self.collection.upsert_multi(docs)
+        if not result.all_ok:
+            failed = ", ".join(sorted(result.exceptions))
+            raise RuntimeError(f"Failed to upsert documents: {failed}")
+        print(f"Inserted batch {offset} to {offset + len(docs)}")
+    
+    def load_dataset(self, resume: bool = True):
+        """Stream AG News through parse, embed and write stages that run at once with bounded buffers"""
+        # Documents are upserted by id, so rows written before an interruption can be skipped on the next run
+        checkpoint = None
+        start = 0
+        if resume:
+            checkpoint = IngestCheckpoint({
+                "dataset": "ag_news",
+                "num_samples": NUM_SAMPLES,
+                "target": f"{CAPELLA_BUCKET}.{CAPELLA_SCOPE}.{CAPELLA_COLLECTION}"
+            })
+            start = checkpoint.load()
+            if start:
+                print(f"Resuming ingestion after {start} rows")
+        
+        print(f"Loading {NUM_SAMPLES or 'all'} samples from AG News dataset...")
+        if ENCODE_WORKERS > 0:
+            self.encode_pool = EncodePool()
+        try:
+            run_pipeline(
+                read_dataset("ag_news", "train", NUM_SAMPLES, INGEST_BATCH_SIZE, start),
+                [("parse", self._parse_batch), ("embed", self._embed_batch), ("write", self._write_batch)],
+                checkpoint
+            )
+        finally:
+            if self.encode_pool is not None:
+                self.encode_pool.close()
+                self.encode_pool = None
+        
+        if checkpoint is not None:
+            checkpoint.clear()
+        
+        # Cached results predate the new documents
+        result_cache.invalidate()
+    
+    def vector_search(
+        self, query: str, limit: int = 5, mode: str = DEFAULT_SEARCH_MODE,
+        prefilter: Optional[SearchQuery] = None, fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Perform vector search using Couchbase, returning results, per-stage timings in seconds and the mode used"""
+        # Generate query embedding, reusing cached vectors for repeated queries
+        timings = {}
+        with stage_timer(timings, "encode"):
+            query_embedding = query_embedding_cache.get_or_compute(
+                MODEL_NAME, query, lambda text: self.model.encode(text).tolist()
+            )
+        
+        results, search_timings, mode = self._cached_search(query_embedding, limit, mode, prefilter, fields, filters)
+        timings.update(search_timings)
+        
+        # Score a sample of live queries against exact kNN for the online recall estimate
+        if not filters:
+            recall_estimator.maybe_observe("articles", query_embedding, [result['id'] for result in results], limit)
+        
+        return results, timings, mode
+    
+    def vector_search_batch(
+        self, queries: List[str], limit: int = 5, mode: str = DEFAULT_SEARCH_MODE,
+        prefilter: Optional[SearchQuery] = None, fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Perform vector search for many queries with a single encoding pass"""
+        query_embeddings, encode_time = self._encode_queries(queries)
+        
+        # Issue the per-query searches concurrently
+        futures = [
+            self.search_executor.submit(self._cached_search, query_embedding, limit, mode, prefilter, fields, filters)
+            for query_embedding in query_embeddings
+        ]
+        return [future.result() for future in futures], encode_time
+    
+    def vector_search_stream(
+        self, query: str, limit: int = 5, mode: str = DEFAULT_SEARCH_MODE,
+        prefilter: Optional[SearchQuery] = None, fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the results of one query as a frame, then a summary frame with the stage timings"""
+        results, timings, mode = self.vector_search(query, limit, mode, prefilter, fields, filters)
+        yield {"event": "results", "results": results}
+        yield {"event": "summary", "num_results": len(results), "search_mode": mode, "timings": timings}
+    
+    def vector_search_batch_stream(
+        self, queries: List[str], limit: int = 5, mode: str = DEFAULT_SEARCH_MODE,
+        prefilter: Optional[SearchQuery] = None, fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield each query's results as soon as its search finishes, then a summary frame"""
+        query_embeddings, encode_time = self._encode_queries(queries)
+        
+        futures = {
+            self.search_executor.submit(self._cached_search, query_embedding, limit, mode, prefilter, fields, filters): i
+            for i, query_embedding in enumerate(query_embeddings)
+        }
+        try:
+            for future in as_completed(futures):
+                results, timings, search_mode = future.result()
+                yield {
+                    "event": "response", "index": futures[future], "results": results,
+                    "search_mode": search_mode, "timings": timings
                 }
-                batch_docs.append(doc)
-            
-            # Insert batch
-            for doc in batch_docs:
-                self.collection.upsert(doc["id"], doc)
+        finally:
+            # Drop searches that have not started if the client goes away early
+            for future in futures:
+                future.cancel()
+        
+        yield {"event": "summary", "num_queries": len(queries), "timings": {"encode": encode_time}}
+    
+    def _encode_queries(self, queries: List[str]):
+        """Encode all uncached queries in one model call, returning the embeddings and the time taken"""
+        timings = {}
+        with stage_timer(timings, "encode"):
+            query_embeddings = query_embedding_cache.get_or_compute_many(
+                MODEL_NAME, queries, lambda texts: self.model.encode(texts, batch_size=BATCH_SIZE).tolist()
+            )
+        return query_embeddings, timings["encode"]
+    
+    def get_documents(self, ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch documents by id with a single multi-get, in the order requested"""
+        fields = RESULT_FIELDS if fields is None else fields
+        fetched = self.collection.get_multi(ids).results
+        
+        documents = []
+        for doc_id in ids:
+            if doc_id in fetched:
+                doc = fetched[doc_id].content_as[dict]
+                documents.append({'id': doc_id, **{field: doc.get(field) for field in fields}})
+        return documents
+    
+    def _cached_search(
+        self, query_embedding: List[float], limit: int, mode: str,
+        prefilter: Optional[SearchQuery] = None, fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Answer from the result cache when a close enough query was seen, otherwise search and cache the results"""
+        # Prefiltered searches have no stable cache key, so they always go to the database
+        if prefilter is not None:
+            return self._search(query_embedding, limit, mode, prefilter, fields, filters)
+        
+        namespace = (mode, tuple(RESULT_FIELDS if fields is None else fields), tuple(sorted((filters or {}).items())))
+        timings = {}
+        with stage_timer(timings, "cache"):
+            results = result_cache.get(namespace, query_embedding, limit)
+        if results is not None:
+            return results, timings, mode
+        
+        # Results of a fallback scan would otherwise be served as KNN results until they expire
+        results, search_timings, used_mode = self._search(query_embedding, limit, mode, prefilter, fields, filters)
+        if used_mode == mode:
+            result_cache.put(namespace, query_embedding, limit, results)
+        return results, {**timings, **search_timings}, used_mode
+    
+    def _search(
+        self, query_embedding: List[float], limit: int, mode: str,
+        prefilter: Optional[SearchQuery] = None, fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Dispatch one query embedding to the vector index or the full-scan query, returning the mode actually used"""
+        fields = RESULT_FIELDS if fields is None else fields
+        unknown_fields = set(fields) - set(RESULT_FIELDS)
+        if unknown_fields:
+            raise ValueError(f"Unknown result fields: {', '.join(sorted(unknown_fields))}")
+        unknown_filters = set(filters or {}) - set(FILTER_FIELDS)
+        if unknown_filters:
+            raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown_filters))}")
+        
+        if mode == "knn":
+            try:
+                return (*self._search_by_knn(query_embedding, limit, fields, prefilter, filters), "knn")
+            except (QueryIndexNotFoundException, SearchIndexNotFoundException) as e:
+                # Filters are applied by the scan too, but a search-query prefilter has no SQL++ equivalent
+                if prefilter is not None:
+                    raise ValueError(f"Search index {VECTOR_INDEX} is unavailable, so the prefilter cannot be applied") from e
+                print(f"Search index {VECTOR_INDEX} is unavailable, falling back to scan: {e}")
+        elif mode != "scan":
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        return (*self._search_by_vector(query_embedding, limit, fields, filters), "scan")
+    
+    def _filter_query(self, filters: Dict[str, Any]) -> SearchQuery:
+        """Translate equality filters into a search query over the fields of the vector index"""
+        queries = [
+            NumericRangeQuery(min=value, max=value, min_inclusive=True, max_inclusive=True, field=field)
+            if isinstance(value, (int, float)) else TermQuery(value, field=field)
+            for field, value in filters.items()
+        ]
+        return queries[0] if len(queries) == 1 else ConjunctionQuery(*queries)
+    
+    def _search_by_knn(
+        self, query_embedding: List[float], limit: int, fields: List[str],
+        prefilter: Optional[SearchQuery] = None, filters: Optional[Dict[str, Any]] = None
+    ):
+        """Run a KNN query through the configured vector search index"""
+        # Filters are applied by the index before the nearest neighbours are chosen
+        if filters:
+            filter_query = self._filter_query(filters)
+            prefilter = filter_query if prefilter is None else ConjunctionQuery(prefilter, filter_query)
+        
+        # Only pass a prefilter when one is given so older SDKs keep working
+        vector_query_args = {"num_candidates": limit}
+        if prefilter is not None:
+            vector_query_args["prefilter"] = prefilter
+        vector_query = VectorQuery.create(VECTOR_FIELD, self.codec.query_vector(query_embedding), **vector_query_args)
+        
+        # Execute search; rows stream lazily, so the request lasts until the last row is read
+        timings = {}
+        with stage_timer(timings, "db_request"):
+            results = self.scope.search(
+                VECTOR_INDEX,
+                SearchRequest.create(VectorSearch.from_vector_query(vector_query)),
+                SearchOptions(limit=limit, fields=list(fields))
+            )
+            rows = list(results.rows())
             
-            print(f"Inserted batch {i} to {i + len(batch_docs)}")
+            # Fetch documents whose requested fields are not stored in the index
+            missing_ids = [row.id for row in rows if fields and not row.fields]
+            documents = {}
+            if missing_ids:
+                fetched = self.collection.get_multi(missing_ids)
+                documents = {doc_id: result.content_as[dict] for doc_id, result in fetched.results.items()}
+        
+        # Format results; KNN rows carry a similarity score, reported as the distance the scan returns
+        with stage_timer(timings, "materialize"):
+            formatted_results = []
+            for row in rows:
+                values = row.fields or documents.get(row.id, {})
+                formatted_results.append({
+                    'id': row.id,
+                    **{field: values.get(field) for field in fields},
+                    'distance': self._knn_distance(row.score)
+                })
+        
+        return formatted_results, timings
     
-    def vector_search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Perform vector search using Couchbase"""
-        # Generate query embedding
-        query_embedding = self.model.encode(query).tolist()
+    def _knn_distance(self, score: float) -> float:
+        """Convert a KNN score, where higher is better, into the L2 distance of the scan, where lower is better"""
+        if VECTOR_SIMILARITY == "l2_norm":
+            # The index scores l2_norm matches as the inverse squared distance between stored vectors
+            return self.codec.distance(math.sqrt(1.0 / score)) if score > 0 else math.inf
         
-        # Construct vector search query
+        # dot_product scores map to L2 for unit vectors; int8 scores carry the codec scale once per side
+        dot = self.codec.distance(self.codec.distance(score))
+        return math.sqrt(max(0.0, 2.0 - 2.0 * dot))
+    
+    def _search_by_vector(
+        self, query_embedding: List[float], limit: int, fields: List[str], filters: Optional[Dict[str, Any]] = None
+    ):
+        """Run the full-scan SQL++ vector query for one query embedding"""
+        # Construct vector search query, selecting only the requested fields
+        projection = "".join(f"a.{field}, " for field in fields)
+        stored_vector = self.codec.sql_vector(f"a.{VECTOR_FIELD}")
+        
+        # Filter values are bound as parameters, and each predicate is backed by its FILTER_INDEX index
+        filters = filters or {}
+        predicates = "".join(f" AND a.{field} = $filter_{field}" for field in filters)
         search_query = f"""
-        SELECT a.id, a.title, a.content, a.category,
-               ARRAY_VECTOR_DISTANCE(a.embedding, $query_vector) as distance
+        SELECT a.id, {projection}
+               ARRAY_VECTOR_DISTANCE({stored_vector}, $query_vector) as distance
         FROM `{CAPELLA_BUCKET}`.`{CAPELLA_SCOPE}`.`{CAPELLA_COLLECTION}` a
-        WHERE type = 'article'
-        ORDER BY ARRAY_VECTOR_DISTANCE(a.embedding, $query_vector)
+        WHERE a.type = 'article'{predicates}
+        ORDER BY ARRAY_VECTOR_DISTANCE({stored_vector}, $query_vector)
         LIMIT $limit
         """
         
-        # Execute search
-        start_time = time.time()
-        results = self.cluster.query(
-            search_query,
-            QueryOptions(
-                named_parameters={
-                    'query_vector': query_embedding,
-                    'limit': limit
-                }
-            )
-        )
+        # Execute search; rows stream lazily, so the request lasts until the last row is read
+        timings = {}
+        with stage_timer(timings, "db_request"):
+            rows = list(self.cluster.query(
+                search_query,
+                QueryOptions(
+                    named_parameters={
+                        'query_vector': self.codec.query_vector(query_embedding),
+                        'limit': limit,
+                        **{f'filter_{field}': value for field, value in filters.items()}
+                    }
+                )
+            ))
         
         # Format results
-        formatted_results = []
-        for row in results:
-            formatted_results.append({
-                'id': row['id'],
-                'title': row['title'],
-                'content': row['content'],
-                'category': row['category'],
-                'distance': row['distance']
-            })
-        
-        search_time = time.time() - start_time
+        with stage_timer(timings, "materialize"):
+            formatted_results = []
+            for row in rows:
+                formatted_results.append({
+                    'id': row['id'],
+                    **{field: row.get(field) for field in fields},
+                    'distance': self.codec.distance(row['distance'])
+                })
         
-        return formatted_results, search_time 
\ No newline at end of file
+        return formatted_results, timings
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .config import EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL
+
+class EmbeddingCache:
+    """Bounded LRU cache of query embeddings with TTL-based expiry"""
+    
+    def __init__(self, max_size: int = EMBEDDING_CACHE_SIZE, ttl_seconds: float = EMBEDDING_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize query text so trivially different spellings share an entry"""
+        return " ".join(text.split())
+    
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for a query, or None on a miss"""
+        key = (model_name, self.normalize(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                # Expired entries count as misses
+                del self._entries[key]
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, model_name: str, text: str, embedding: List[float]):
+        """Store an embedding, evicting the least recently used entries when full"""
+        key = (model_name, self.normalize(text))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def get_or_compute(self, model_name: str, text: str, encode: Callable[[str], List[float]]) -> List[float]:
+        """Return the cached embedding, computing and storing it on a miss"""
+        embedding = self.get(model_name, text)
+        if embedding is None:
+            embedding = list(encode(text))
+            self.put(model_name, text, embedding)
+        return embedding
+    
+    def get_or_compute_many(
+        self, model_name: str, texts: List[str], encode_many: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """Return embeddings for many queries, encoding all misses in a single call"""
+        embeddings = [self.get(model_name, text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            encoded = encode_many([texts[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = list(embedding)
+                self.put(model_name, texts[i], embeddings[i])
+        return embeddings
+    
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+# Process-wide cache shared by every search path
+query_embedding_cache = EmbeddingCache()
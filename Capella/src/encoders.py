@@ -0,0 +1,74 @@
+from sentence_transformers import SentenceTransformer
+from typing import Any, Dict, List
+import os
+import time
+import numpy as np
+from .config import ENCODER_BACKEND, ENCODER_EXPORT_DIR, ONNX_QUANTIZATION_CONFIG
+
+ENCODER_BACKENDS = ["torch", "int8", "onnx", "onnx_int8"]
+
+def _load_onnx_int8(model_name: str) -> SentenceTransformer:
+    """Export a dynamically quantized ONNX model once, then load it from the export directory"""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    
+    export_dir = os.path.join(ENCODER_EXPORT_DIR, model_name.replace("/", "__"))
+    file_name = f"onnx/model_qint8_{ONNX_QUANTIZATION_CONFIG}.onnx"
+    
+    if not os.path.exists(os.path.join(export_dir, file_name)):
+        model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        model.save_pretrained(export_dir)
+        export_dynamic_quantized_onnx_model(model, ONNX_QUANTIZATION_CONFIG, export_dir)
+    
+    return SentenceTransformer(export_dir, device="cpu", backend="onnx", model_kwargs={"file_name": file_name})
+
+def load_encoder(model_name: str, backend: str = ENCODER_BACKEND) -> SentenceTransformer:
+    """Load a sentence-transformer encoder for the selected inference backend"""
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "int8":
+        # Dynamic int8 quantization of the Linear layers for CPU inference
+        import torch
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    if backend == "onnx_int8":
+        return _load_onnx_int8(model_name)
+    raise ValueError(f"Unknown encoder backend: {backend}")
+
+def measure_accuracy_delta(model_name: str, backend: str, texts: List[str], batch_size: int = 32) -> Dict[str, Any]:
+    """Compare a backend's embeddings and latency against the fp32 torch encoder on the same texts"""
+    reference_model = SentenceTransformer(model_name, device="cpu")
+    candidate_model = load_encoder(model_name, backend)
+    
+    timings = {}
+    embeddings = {}
+    for name, model in (("fp32", reference_model), (backend, candidate_model)):
+        model.encode(texts[:batch_size], batch_size=batch_size)  # Warm up before timing
+        start_time = time.perf_counter()
+        embeddings[name] = np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+        timings[name] = time.perf_counter() - start_time
+    
+    reference = embeddings["fp32"] / np.linalg.norm(embeddings["fp32"], axis=1, keepdims=True)
+    candidate = embeddings[backend] / np.linalg.norm(embeddings[backend], axis=1, keepdims=True)
+    cosine = np.einsum("ij,ij->i", reference, candidate)
+    
+    # Fraction of each text's 10 nearest neighbours (by fp32) that the backend preserves
+    k = min(10, len(texts) - 1)
+    reference_neighbors = np.argsort(-(reference @ reference.T), axis=1)[:, 1:k + 1]
+    candidate_neighbors = np.argsort(-(candidate @ candidate.T), axis=1)[:, 1:k + 1]
+    overlap = [
+        len(set(a) & set(b)) / k for a, b in zip(reference_neighbors, candidate_neighbors)
+    ] if k > 0 else [1.0]
+    
+    return {
+        "model": model_name,
+        "backend": backend,
+        "num_texts": len(texts),
+        "mean_cosine_to_fp32": float(cosine.mean()),
+        "min_cosine_to_fp32": float(cosine.min()),
+        "neighbor_overlap_at_10": float(np.mean(overlap)),
+        "fp32_ms_per_text": timings["fp32"] * 1000 / len(texts),
+        "backend_ms_per_text": timings[backend] * 1000 / len(texts),
+        "speedup": timings["fp32"] / timings[backend]
+    }
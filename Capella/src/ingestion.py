@@ -0,0 +1,138 @@
+import itertools
+import json
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from datasets import load_dataset
+from .config import INGEST_STREAMING, INGEST_QUEUE_SIZE, INGEST_CHECKPOINT_PATH
+
+# Marks the end of the stream on a stage queue
+_DONE = object()
+
+class IngestCheckpoint:
+    """Records how many leading dataset rows have been written so an interrupted ingest can resume"""
+    
+    def __init__(self, key: Dict[str, Any], path: str = INGEST_CHECKPOINT_PATH):
+        self.key = key
+        self.path = path
+    
+    def load(self) -> int:
+        """Return the number of rows already written, or 0 when there is nothing to resume"""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path) as f:
+            state = json.load(f)
+        
+        # A checkpoint left by a different dataset or target does not apply
+        return state["rows"] if state.get("key") == self.key else 0
+    
+    def save(self, rows: int):
+        """Atomically record that the first rows have been written"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"key": self.key, "rows": rows}, f)
+        os.replace(tmp_path, self.path)
+    
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def read_dataset(
+    name: str, split: str, num_samples: Optional[int], batch_size: int, start: int = 0
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Yield (offset, rows) batches from a dataset split, streaming it from the hub when INGEST_STREAMING is set"""
+    if INGEST_STREAMING:
+        dataset = load_dataset(name, split=split, streaming=True)
+        if num_samples is not None:
+            dataset = dataset.take(num_samples)
+        rows = iter(dataset.skip(start))
+    else:
+        # The Arrow file is memory-mapped, so only the rows being iterated are in memory
+        dataset = load_dataset(name, split=split)
+        end = len(dataset) if num_samples is None else min(num_samples, len(dataset))
+        rows = iter(dataset.select(range(min(start, end), end)))
+    
+    offset = start
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield offset, batch
+        offset += len(batch)
+
+def run_pipeline(
+    batches: Iterator[Tuple[int, List[Any]]],
+    stages: List[Tuple[str, Callable[[Any, int], Any]]],
+    checkpoint: Optional[IngestCheckpoint] = None,
+    queue_size: int = INGEST_QUEUE_SIZE
+):
+    """Run the reader and each stage(batch, offset) in its own thread, connected by bounded queues"""
+    # One thread per stage keeps batches in order, so the checkpoint only moves past fully written rows
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    stop = threading.Event()
+    errors = []
+    
+    def put(q: queue.Queue, item) -> bool:
+        # Stop waiting on a full queue once another stage has failed
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def read():
+        try:
+            for offset, batch in batches:
+                if not put(queues[0], (offset, len(batch), batch)):
+                    return
+            put(queues[0], _DONE)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+    
+    def work(i: int, name: str, stage: Callable[[Any, int], Any]):
+        is_last = i == len(stages) - 1
+        while not stop.is_set():
+            try:
+                item = queues[i].get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            if item is _DONE:
+                if not is_last:
+                    put(queues[i + 1], _DONE)
+                return
+            
+            offset, size, batch = item
+            try:
+                result = stage(batch, offset)
+            except Exception as e:
+                errors.append(RuntimeError(f"Ingest stage {name} failed on rows {offset} to {offset + size}: {e}"))
+                stop.set()
+                return
+            
+            if not is_last:
+                if not put(queues[i + 1], (offset, size, result)):
+                    return
+            elif checkpoint is not None:
+                checkpoint.save(offset + size)
+    
+    threads = [threading.Thread(target=read, name="ingest-read", daemon=True)] + [
+        threading.Thread(target=work, args=(i, name, stage), name=f"ingest-{name}", daemon=True)
+        for i, (name, stage) in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        # Let the stages drop what they hold; the checkpoint already covers every finished write
+        stop.set()
+        raise
+    
+    if errors:
+        raise errors[0]
@@ -0,0 +1,212 @@
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+class LocalVectorIndex:
+    """In-process vector index with exact brute-force and IVF approximate search"""
+    
+    def __init__(self, dim: int, metric: str = "l2"):
+        if metric not in ("l2", "l2_squared"):
+            raise ValueError(f"Unsupported metric: {metric}")
+        
+        self.dim = dim
+        self.metric = metric
+        self.ids: List[Any] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.id_rows: Dict[Any, int] = {}
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        
+        # (vectors, norms) batches added since the arrays above were last read, merged in one copy
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        
+        # IVF state: centroids plus the rows of each list stored back to back
+        self.centroids: Optional[np.ndarray] = None
+        self.list_rows: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+        
+        # Secondary indexes mapping each value of a payload field to its rows, built on first filter
+        self._value_rows: Dict[str, Dict[Any, np.ndarray]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def vectors(self) -> np.ndarray:
+        self._merge_pending()
+        return self._vectors
+    
+    @property
+    def norms(self) -> np.ndarray:
+        self._merge_pending()
+        return self._norms
+    
+    def _merge_pending(self):
+        """Concatenate every batch added since the last read at once, so ingestion copies the matrix once"""
+        if self._pending:
+            self._vectors = np.concatenate([self._vectors] + [vectors for vectors, _ in self._pending])
+            self._norms = np.concatenate([self._norms] + [norms for _, norms in self._pending])
+            self._pending = []
+    
+    def add(self, ids: List[Any], vectors, payloads: List[Dict[str, Any]]):
+        """Append vectors with their ids and payloads; invalidates any IVF lists"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if not len(ids) == len(payloads) == len(vectors):
+            raise ValueError(f"Got {len(ids)} ids, {len(payloads)} payloads and {len(vectors)} vectors")
+        
+        self.id_rows.update((doc_id, row) for row, doc_id in enumerate(ids, start=len(self.ids)))
+        self.ids.extend(ids)
+        self.payloads.extend(payloads)
+        self._pending.append((vectors, np.einsum("ij,ij->i", vectors, vectors)))
+        self.centroids = self.list_rows = self.list_offsets = None
+        self._value_rows = {}
+    
+    def build_ivf(self, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        """Cluster the vectors with k-means and build the inverted lists"""
+        n = len(self)
+        if n == 0:
+            return
+        
+        # Default to ~4*sqrt(n) lists, never more lists than vectors
+        nlist = min(nlist or max(1, int(4 * np.sqrt(n))), n)
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(n, nlist, replace=False)].copy()
+        
+        for _ in range(iterations):
+            assignments = self._nearest(self.vectors, centroids, 1)[0][:, 0]
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, self.vectors)
+            counts = np.bincount(assignments, minlength=nlist)
+            
+            # Keep the previous centroid for lists that ended up empty
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        
+        assignments = self._nearest(self.vectors, centroids, 1)[0][:, 0]
+        self.centroids = centroids
+        self.list_rows = np.argsort(assignments, kind="stable")
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))])
+    
+    @staticmethod
+    def _nearest(queries: np.ndarray, vectors: np.ndarray, k: int, vector_norms=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (rows, squared distances) of the k nearest vectors for each query"""
+        if vector_norms is None:
+            vector_norms = np.einsum("ij,ij->i", vectors, vectors)
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        
+        # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2, computed as one matrix product
+        distances = vector_norms[None, :] - 2.0 * (queries @ vectors.T) + query_norms[:, None]
+        np.maximum(distances, 0.0, out=distances)
+        
+        k = min(k, vectors.shape[0])
+        rows = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(distances, rows, axis=1)
+        order = np.argsort(top, axis=1)
+        return np.take_along_axis(rows, order, axis=1), np.take_along_axis(top, order, axis=1)
+    
+    def _finish(self, distances: np.ndarray) -> np.ndarray:
+        return np.sqrt(distances) if self.metric == "l2" else distances
+    
+    def search_batch(self, queries, k: int, mode: str = "exact", nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (rows, distances) of the k nearest vectors for each query"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if len(self) == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty
+        
+        if mode == "exact":
+            rows, distances = self._nearest(queries, self.vectors, k, self.norms)
+            return rows, self._finish(distances)
+        if mode != "ivf":
+            raise ValueError(f"Unsupported search mode: {mode}")
+        
+        if self.centroids is None:
+            self.build_ivf()
+        
+        # Probe the nprobe closest lists, then search their members exactly
+        probes = self._nearest(queries, self.centroids, nprobe)[0]
+        all_rows, all_distances = [], []
+        for query, lists in zip(queries, probes):
+            candidates = np.concatenate([
+                self.list_rows[self.list_offsets[l]:self.list_offsets[l + 1]] for l in lists
+            ])
+            rows, distances = self._nearest(
+                query[None, :], self.vectors[candidates], k, self.norms[candidates]
+            )
+            all_rows.append(candidates[rows[0]])
+            all_distances.append(distances[0])
+        
+        # Pad short candidate sets so every query returns a row of equal length
+        width = max(len(rows) for rows in all_rows)
+        rows_out = np.full((len(queries), width), -1, dtype=np.int64)
+        distances_out = np.full((len(queries), width), np.inf, dtype=np.float32)
+        for i, (rows, distances) in enumerate(zip(all_rows, all_distances)):
+            rows_out[i, :len(rows)] = rows
+            distances_out[i, :len(distances)] = distances
+        return rows_out, self._finish(distances_out)
+    
+    def search(self, query, k: int, mode: str = "exact", nprobe: int = 8) -> List[Tuple[Dict[str, Any], float]]:
+        """Return (payload, distance) pairs for the k nearest vectors to one query"""
+        rows, distances = self.search_batch(query, k, mode, nprobe)
+        return [
+            (self.payloads[row], float(distance))
+            for row, distance in zip(rows[0], distances[0]) if row >= 0
+        ]
+    
+    def filter_rows(self, filters: Dict[str, Any], value: Optional[Callable[[Dict[str, Any], str], Any]] = None) -> np.ndarray:
+        """Return the rows whose payload matches every filter value, through a secondary index per field"""
+        value = value or (lambda payload, field: payload.get(field))
+        rows = np.arange(len(self))
+        for field, wanted in filters.items():
+            if field not in self._value_rows:
+                value_rows: Dict[Any, List[int]] = {}
+                for row, payload in enumerate(self.payloads):
+                    value_rows.setdefault(value(payload, field), []).append(row)
+                self._value_rows[field] = {key: np.asarray(matches, dtype=np.int64) for key, matches in value_rows.items()}
+            rows = np.intersect1d(rows, self._value_rows[field].get(wanted, np.empty(0, dtype=np.int64)), assume_unique=True)
+        return rows
+    
+    def search_rows(self, query, k: int, rows) -> List[Tuple[Dict[str, Any], float]]:
+        """Return (payload, distance) pairs for the k nearest of the given rows to one query, searched exactly"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return []
+        
+        query = np.asarray(query, dtype=np.float32).reshape(1, self.dim)
+        found, distances = self._nearest(query, self.vectors[rows], k, self.norms[rows])
+        return [
+            (self.payloads[rows[row]], float(distance))
+            for row, distance in zip(found[0], self._finish(distances)[0])
+        ]
+    
+    def save(self, path: str):
+        """Write the index to a directory"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.npy"), self.vectors)
+        if self.centroids is not None:
+            np.save(os.path.join(path, "centroids.npy"), self.centroids)
+            np.save(os.path.join(path, "list_rows.npy"), self.list_rows)
+            np.save(os.path.join(path, "list_offsets.npy"), self.list_offsets)
+        
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"dim": self.dim, "metric": self.metric, "ids": self.ids, "payloads": self.payloads}, f)
+    
+    @classmethod
+    def load(cls, path: str) -> "LocalVectorIndex":
+        """Read an index written by save, memory-mapping the vectors"""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        
+        index = cls(meta["dim"], meta["metric"])
+        index.ids = meta["ids"]
+        index.payloads = meta["payloads"]
+        index.id_rows = {doc_id: row for row, doc_id in enumerate(index.ids)}
+        index._vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        index._norms = np.einsum("ij,ij->i", index._vectors, index._vectors)
+        
+        if os.path.exists(os.path.join(path, "centroids.npy")):
+            index.centroids = np.load(os.path.join(path, "centroids.npy"))
+            index.list_rows = np.load(os.path.join(path, "list_rows.npy"))
+            index.list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        return index
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import os
+from .config import *
+from .couchbase_manager import CouchbaseManager
+from .embedding_store import EmbeddingStore
+from .encoders import load_encoder
+from .local_index import LocalVectorIndex
+from .metrics import stage_timer
+from .vector_codec import VectorCodec
+
+class LocalManager(CouchbaseManager):
+    """In-process stand-in for CouchbaseManager backed by a LocalVectorIndex"""
+    
+    def __init__(self, index_path: str = LOCAL_INDEX_PATH, vector_encoding: str = VECTOR_ENCODING):
+        # Documents carry encoded vectors like in Couchbase; the index decodes them back to float32
+        self.codec = VectorCodec(vector_encoding)
+        
+        # Initialize embedding model on the configured inference backend
+        self.model = load_encoder(MODEL_NAME)
+        
+        # Persistent document embeddings reused across ingestion runs
+        self.embedding_store = EmbeddingStore(MODEL_NAME, VECTOR_DIM)
+        
+        # Thread pool used to issue batched queries concurrently
+        self.search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS)
+        
+        # Process pool that shards ingestion encoding across cores, started by load_dataset
+        self.encode_pool = None
+        
+        # Load a previously saved index if there is one
+        self.index_path = index_path
+        if os.path.exists(os.path.join(index_path, "meta.json")):
+            self.index = LocalVectorIndex.load(index_path)
+        else:
+            self.index = LocalVectorIndex(VECTOR_DIM)
+    
+    def setup_database(self):
+        """Reset the local index"""
+        self.index = LocalVectorIndex(VECTOR_DIM)
+        print("Local index setup completed")
+    
+    def _write_batch(self, docs: Dict[str, Dict[str, Any]], offset: int):
+        """Add one batch of documents to the local index"""
+        self.index.add(
+            list(docs),
+            [self.codec.decode(doc[VECTOR_FIELD]) for doc in docs.values()],
+            [{key: value for key, value in doc.items() if key != VECTOR_FIELD} for doc in docs.values()]
+        )
+        print(f"Indexed batch {offset} to {offset + len(docs)}")
+    
+    def load_dataset(self, resume: bool = False):
+        """Load AG News into the local index, build the IVF lists and save it"""
+        # The index is only saved at the end, so there is never a partial ingest to resume
+        super().load_dataset(resume=False)
+        self.index.build_ivf()
+        self.index.save(self.index_path)
+        print(f"Saved local index with {len(self.index)} documents to {self.index_path}")
+    
+    def get_documents(self, ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch documents by id from the local index payloads, in the order requested"""
+        fields = RESULT_FIELDS if fields is None else fields
+        payloads, id_rows = self.index.payloads, self.index.id_rows
+        return [
+            {'id': doc_id, **{field: payloads[id_rows[doc_id]].get(field) for field in fields}}
+            for doc_id in ids if doc_id in id_rows
+        ]
+    
+    def _search_by_knn(self, query_embedding: List[float], limit: int, fields: List[str], prefilter=None, filters=None):
+        """Approximate search over the local IVF lists"""
+        return self._search_index(query_embedding, limit, fields, "ivf", filters)
+    
+    def _search_by_vector(self, query_embedding: List[float], limit: int, fields: List[str], filters=None):
+        """Exact brute-force search over the local index"""
+        return self._search_index(query_embedding, limit, fields, "exact", filters)
+    
+    def _search_index(
+        self, query_embedding: List[float], limit: int, fields: List[str], mode: str,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Search the local index for one query embedding, only among the matching rows when filtered"""
+        timings = {}
+        with stage_timer(timings, "db_request"):
+            if filters:
+                hits = self.index.search_rows(query_embedding, limit, self.index.filter_rows(filters))
+            else:
+                hits = self.index.search(query_embedding, limit, mode=mode, nprobe=LOCAL_NPROBE)
+        
+        # Format results
+        with stage_timer(timings, "materialize"):
+            formatted_results = []
+            for payload, distance in hits:
+                formatted_results.append({
+                    'id': payload['id'],
+                    **{field: payload.get(field) for field in fields},
+                    'distance': distance
+                })
+        
+        return formatted_results, timings
@@ -0,0 +1,69 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from .config import LATENCY_BUCKETS
+
+@contextmanager
+def stage_timer(timings: Dict[str, float], stage: str):
+    """Add the time spent in the block to timings[stage], on the monotonic clock"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+class Histogram:
+    """Fixed-bucket latency histogram with Prometheus semantics"""
+    
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+class StageMetrics:
+    """Per-endpoint, per-stage request latency histograms exposed in the Prometheus text format"""
+    
+    NAME = "search_stage_duration_seconds"
+    
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = sorted(buckets)
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, endpoint: str, timings: Dict[str, float]):
+        """Record one request's stage timings, in seconds"""
+        with self._lock:
+            for stage, seconds in timings.items():
+                histogram = self._histograms.get((endpoint, stage))
+                if histogram is None:
+                    histogram = self._histograms[(endpoint, stage)] = Histogram(self.buckets)
+                histogram.observe(seconds)
+    
+    def render(self) -> str:
+        """Render every histogram in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.NAME} Time spent in each stage of a search request",
+            f"# TYPE {self.NAME} histogram"
+        ]
+        with self._lock:
+            for (endpoint, stage), histogram in sorted(self._histograms.items()):
+                labels = f'endpoint="{endpoint}",stage="{stage}"'
+                
+                # Prometheus buckets are cumulative
+                cumulative = 0
+                for bound, count in zip(self.buckets + [float("inf")], histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{self.NAME}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{self.NAME}_sum{{{labels}}} {histogram.sum!r}")
+                lines.append(f"{self.NAME}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+# Process-wide histograms shared by all search endpoints
+stage_metrics = StageMetrics()
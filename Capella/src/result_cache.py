@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from .config import RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_THRESHOLD, RESULT_CACHE_VERSION_PATH
+
+class ResultCache:
+    """LRU cache of search results keyed by query embedding, reused for near-duplicate queries above a cosine threshold"""
+    
+    def __init__(
+        self,
+        max_size: int = RESULT_CACHE_SIZE,
+        ttl_seconds: float = RESULT_CACHE_TTL,
+        threshold: float = RESULT_CACHE_THRESHOLD,
+        version_path: str = RESULT_CACHE_VERSION_PATH
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.version_path = version_path
+        self.hits = 0
+        self.misses = 0
+        
+        # Unit query vectors live in a fixed matrix so one product scores every entry; empty rows score 0
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, Tuple[float, Hashable, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._free_slots = list(range(max_size))
+        self._version = self._read_version()
+        self._lock = threading.Lock()
+    
+    def _read_version(self) -> Optional[int]:
+        try:
+            return os.stat(self.version_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def _check_version(self):
+        """Drop everything once another process has ingested new data"""
+        version = self._read_version()
+        if version != self._version:
+            self._version = version
+            self._clear()
+    
+    def _clear(self):
+        self._entries.clear()
+        self._free_slots = list(range(self.max_size))
+        if self._vectors is not None:
+            self._vectors[:] = 0.0
+    
+    def _remove(self, slot: int):
+        del self._entries[slot]
+        self._vectors[slot] = 0.0
+        self._free_slots.append(slot)
+    
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def get(self, namespace: Hashable, embedding, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Return the first limit results of the closest cached query that asked for at least limit, or None"""
+        if self.max_size == 0:
+            return None
+        
+        query = self._unit(embedding)
+        with self._lock:
+            self._check_version()
+            if self._entries:
+                similarities = self._vectors @ query
+                candidates = np.flatnonzero(similarities >= self.threshold)
+                for slot in candidates[np.argsort(-similarities[candidates])]:
+                    created, entry_namespace, entry_limit, results = self._entries[slot]
+                    if time.monotonic() - created > self.ttl_seconds:
+                        self._remove(slot)
+                        continue
+                    
+                    # Results are sorted best first, so a longer cached list answers any shorter request
+                    if entry_namespace == namespace and entry_limit >= limit:
+                        self._entries.move_to_end(slot)
+                        self.hits += 1
+                        return results[:limit]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, namespace: Hashable, embedding, limit: int, results: List[Dict[str, Any]]):
+        """Store results for a query, evicting the least recently used entry when full"""
+        if self.max_size == 0:
+            return
+        
+        query = self._unit(embedding)
+        with self._lock:
+            self._check_version()
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, len(query)), dtype=np.float32)
+            
+            if not self._free_slots:
+                self._remove(next(iter(self._entries)))
+            slot = self._free_slots.pop()
+            self._vectors[slot] = query
+            self._entries[slot] = (time.monotonic(), namespace, limit, list(results))
+    
+    def invalidate(self):
+        """Drop all cached results here and, through the version file, in every other process"""
+        with open(self.version_path, "w") as f:
+            f.write(str(time.time_ns()))
+        with self._lock:
+            self._version = self._read_version()
+            self._clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+# Process-wide cache shared by all searches
+result_cache = ResultCache()
@@ -0,0 +1,74 @@
+import base64
+from typing import Any, List
+import numpy as np
+from .config import VECTOR_INT8_MAX_ABS
+
+VECTOR_ENCODINGS = ["float", "base64_f32", "base64_f16", "int8"]
+
+# Encodings Couchbase can search: SQL++ DECODE_VECTOR and the vector_base64 index field only read float32
+SERVER_SEARCHABLE_ENCODINGS = ["float", "base64_f32", "int8"]
+
+class VectorCodec:
+    """Converts embeddings to and from their stored form in Couchbase documents"""
+    
+    def __init__(self, encoding: str, int8_max_abs: float = VECTOR_INT8_MAX_ABS):
+        if encoding not in VECTOR_ENCODINGS:
+            raise ValueError(f"Unknown vector encoding: {encoding}")
+        self.encoding = encoding
+        
+        # int8 uses one global scale so stored vectors and queries stay comparable without per-document metadata
+        self.scale = int8_max_abs / 127.0
+    
+    def encode_batch(self, vectors) -> List[Any]:
+        """Encode a batch of vectors into JSON-serializable stored values"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.encoding == "float":
+            return vectors.tolist()
+        if self.encoding == "int8":
+            return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8).tolist()
+        
+        # Little-endian, which is what DECODE_VECTOR and the vector_base64 index expect by default
+        dtype = "<f4" if self.encoding == "base64_f32" else "<f2"
+        return [base64.b64encode(vector.astype(dtype).tobytes()).decode("ascii") for vector in vectors]
+    
+    def encode(self, vector) -> Any:
+        return self.encode_batch(np.asarray(vector, dtype=np.float32)[None, :])[0]
+    
+    def decode(self, value: Any) -> np.ndarray:
+        """Decode one stored value back to a float32 vector"""
+        if self.encoding == "float":
+            return np.asarray(value, dtype=np.float32)
+        if self.encoding == "int8":
+            return np.asarray(value, dtype=np.float32) * self.scale
+        dtype = "<f4" if self.encoding == "base64_f32" else "<f2"
+        return np.frombuffer(base64.b64decode(value), dtype=dtype).astype(np.float32)
+    
+    @property
+    def server_searchable(self) -> bool:
+        return self.encoding in SERVER_SEARCHABLE_ENCODINGS
+    
+    def query_vector(self, embedding: List[float]) -> List[float]:
+        """Map a query embedding into the space of the stored vectors"""
+        if self.encoding == "int8":
+            return (np.asarray(embedding, dtype=np.float32) / self.scale).tolist()
+        return list(embedding)
+    
+    def distance(self, stored_distance: float) -> float:
+        """Map a distance computed against stored vectors back to the embedding space"""
+        return stored_distance * self.scale if self.encoding == "int8" else stored_distance
+    
+    def sql_vector(self, field: str) -> str:
+        """SQL++ expression that yields the stored vector of field as an array of numbers"""
+        if self.encoding == "base64_f32":
+            return f"DECODE_VECTOR({field}, false)"
+        if self.encoding == "base64_f16":
+            raise ValueError("base64_f16 vectors cannot be decoded by SQL++; use base64_f32 or int8")
+        return field
+    
+    def index_field_type(self) -> str:
+        """Search index field type that reads this encoding"""
+        if self.encoding == "base64_f32":
+            return "vector_base64"
+        if self.encoding == "base64_f16":
+            raise ValueError("base64_f16 vectors cannot be indexed by Couchbase search; use base64_f32 or int8")
+        return "vector"
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import requests
+
+# Search endpoint and request body builder for each service
+TARGETS = {
+    "capella": {
+        "project_dir": "Capella",
+        "path": "/search/vector",
+        "body": lambda query, limit: {"query": query, "limit": limit}
+    },
+    "zilliz": {
+        "project_dir": "Zilliz",
+        "path": "/search/semantic",
+        "body": lambda query, limit: {"query": query, "limit": limit}
+    }
+}
+
+# Used when no query file is given; a small mix of AG News style topics
+DEFAULT_QUERIES = [
+    "latest technology innovations in AI",
+    "stock market falls on oil prices",
+    "world cup qualifying results",
+    "new smartphone release",
+    "central bank raises interest rates",
+    "peace talks in the middle east",
+    "olympic gold medal swimming",
+    "software company quarterly earnings",
+    "space telescope discovers planet",
+    "election campaign polls"
+]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": sum(values) / len(values) if values else None
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+class QuerySampler:
+    """Draws queries uniformly or with a Zipf-like skew towards the head of the list"""
+    
+    def __init__(self, queries: List[str], distribution: str, seed: int):
+        self.queries = queries
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        if distribution == "zipf":
+            self.weights = [1.0 / rank for rank in range(1, len(queries) + 1)]
+        else:
+            self.weights = None
+    
+    def next(self) -> str:
+        with self.lock:
+            return self.rng.choices(self.queries, weights=self.weights)[0]
+
+def run_worker(url: str, target: Dict[str, Any], sampler: QuerySampler, limit: int, deadline: float, records: List[Dict[str, Any]]):
+    """Send requests back to back until the deadline, recording one entry per request"""
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        query = sampler.next()
+        start = time.perf_counter()
+        record = {"ok": False}
+        try:
+            response = session.post(url, json=target["body"](query, limit), timeout=60)
+            record["latency_ms"] = (time.perf_counter() - start) * 1000
+            record["status"] = response.status_code
+            if response.ok:
+                record["ok"] = True
+                metrics = response.json().get("metrics", {})
+                record["stages"] = {
+                    key: value for key, value in metrics.items()
+                    if key.endswith("_ms") and isinstance(value, (int, float))
+                }
+        except requests.RequestException as e:
+            record["latency_ms"] = (time.perf_counter() - start) * 1000
+            record["error"] = type(e).__name__
+        records.append(record)
+
+def wait_until_ready(base_url: str, timeout: float):
+    """Poll /ready until the service reports ready"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/ready", timeout=5).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"Service at {base_url} was not ready after {timeout:.0f}s")
+
+def launch_local_service(target_name: str, port: int) -> subprocess.Popen:
+    """Start the target API on the in-process local backend, with no external services"""
+    env = dict(os.environ, SEARCH_BACKEND="local", LLM_BACKEND="fake")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=os.path.join(REPO_ROOT, TARGETS[target_name]["project_dir"]),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+def run_benchmark(args) -> Dict[str, Any]:
+    target = TARGETS[args.target]
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    service = launch_local_service(args.target, args.port) if args.local else None
+    
+    try:
+        wait_until_ready(base_url, args.ready_timeout)
+        
+        if args.queries:
+            with open(args.queries) as f:
+                queries = [line.strip() for line in f if line.strip()]
+        else:
+            queries = DEFAULT_QUERIES
+        sampler = QuerySampler(queries, args.distribution, args.seed)
+        
+        # Warm up outside the measured window
+        url = f"{base_url}{target['path']}"
+        warmup_records: List[Dict[str, Any]] = []
+        run_worker(url, target, sampler, args.limit, time.perf_counter() + args.warmup, warmup_records)
+        
+        records: List[Dict[str, Any]] = []
+        start = time.perf_counter()
+        deadline = start + args.duration
+        workers = [
+            threading.Thread(target=run_worker, args=(url, target, sampler, args.limit, deadline, records))
+            for _ in range(args.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+    
+    successes = [record for record in records if record["ok"]]
+    stage_names = sorted({name for record in successes for name in record.get("stages", {})})
+    
+    return {
+        "target": args.target,
+        "endpoint": target["path"],
+        "local": args.local,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "limit": args.limit,
+            "distribution": args.distribution,
+            "num_queries": len(queries)
+        },
+        "requests": len(records),
+        "errors": len(records) - len(successes),
+        "error_rate": (len(records) - len(successes)) / len(records) if records else 0.0,
+        "qps": len(successes) / elapsed if elapsed else 0.0,
+        "latency_ms": summarize([record["latency_ms"] for record in successes]),
+        "stages_ms": {
+            name: summarize([record["stages"][name] for record in successes if name in record.get("stages", {})])
+            for name in stage_names
+        }
+    }
+
+def print_report(result: Dict[str, Any]):
+    print(f"{result['target']} {result['endpoint']} @ {result['config']['concurrency']} clients")
+    print(f"  requests={result['requests']} errors={result['errors']} ({result['error_rate']:.2%}) qps={result['qps']:.1f}")
+    rows = [("client latency", result["latency_ms"])] + list(result["stages_ms"].items())
+    for name, stats in rows:
+        if stats["p50"] is None:
+            continue
+        print(f"  {name:<24} p50={stats['p50']:8.2f}ms p95={stats['p95']:8.2f}ms p99={stats['p99']:8.2f}ms")
+
+def compare(baseline_path: str, candidate_path: str):
+    """Print QPS and latency changes between two result files"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+    
+    def change(before, after):
+        return f"{before:.2f} -> {after:.2f} ({(after - before) / before:+.1%})" if before else f"{before} -> {after}"
+    
+    print(f"{(baseline.get('commit') or '?')[:10]} -> {(candidate.get('commit') or '?')[:10]}")
+    print(f"  qps: {change(baseline['qps'], candidate['qps'])}")
+    for q in ("p50", "p95", "p99"):
+        print(f"  {q}: {change(baseline['latency_ms'][q], candidate['latency_ms'][q])}")
+    print(f"  error rate: {baseline['error_rate']:.2%} -> {candidate['error_rate']:.2%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the vector search APIs")
+    parser.add_argument("target", nargs="?", choices=sorted(TARGETS), help="Service to benchmark")
+    parser.add_argument("--url", help="Base URL of a running service (default: http://127.0.0.1:PORT)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--local", action="store_true", help="Launch the service on its local backend (build it first with SEARCH_BACKEND=local python setup_database.py)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured warm-up seconds")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--queries", help="File with one query per line")
+    parser.add_argument("--distribution", choices=["uniform", "zipf"], default="zipf")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+    parser.add_argument("--output", help="Result JSON path (default: results/<target>-<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), help="Compare two result files")
+    args = parser.parse_args()
+    
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.target is None:
+        parser.error("a target is required unless --compare is given")
+    
+    result = run_benchmark(args)
+    print_report(result)
+    
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"{args.target}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
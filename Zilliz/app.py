@@ -13,19 +13,22 @@ def format_metrics(metrics: Dict) -> None:
     with col1:
         st.subheader("Latency Breakdown")
         latency_df = pd.DataFrame({
-            'Metric': ['Total Time', 'Embedding Time', 'Search Time', 'Network Time'],
+            'Metric': ['Total Time', 'Embedding Time', 'Keyword Time', 'Search Time', 'Materialize Time', 'Queue Time'],
             'Duration (ms)': [
-                f"{metrics['total_time_ms']:.2f}",
-                f"{metrics['embedding_time_ms']:.2f}",
-                f"{metrics['search_time_ms']:.2f}",
-                f"{metrics['network_time_ms']:.2f}"
+                f"{metrics.get(key, 0.0):.2f}"
+                for key in [
+                    'total_time_ms', 'embedding_time_ms', 'keyword_time_ms',
+                    'search_time_ms', 'materialize_time_ms', 'queue_time_ms'
+                ]
             ]
         })
         st.dataframe(latency_df, hide_index=True)
     
     with col2:
         st.subheader("Search Quality")
-        st.metric("Recall Score", f"{metrics['recall']*100:.1f}%")
+        # Recall is a sampled online estimate and is absent until the first sample
+        recall = metrics.get('recall')
+        st.metric("Recall Score", f"{recall*100:.1f}%" if recall is not None else "n/a")
 
 def display_results(results: List[Dict]) -> None:
     """Display search results in a clean format"""
@@ -63,7 +66,7 @@ def main():
         st.markdown("""
         ### Search Types
         - **Semantic Search**: Uses vector similarity to find related articles
-        - **Hybrid Search**: Combines vector similarity with keyword matching
+        - **Hybrid Search**: Fuses vector similarity with BM25 keyword matching over title, content and keywords
         """)
     
     # Main search interface
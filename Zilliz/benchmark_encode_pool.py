@@ -0,0 +1,55 @@
+from src.encode_pool import EncodePool
+from src.config import TITLE_MODEL, CONTENT_MODEL, SUMMARY_MODEL
+from datasets import load_dataset
+import json
+import os
+import sys
+import time
+
+NUM_TEXTS = 2000  # AG News test articles encoded per measurement
+OUTPUT_PATH = "encode_pool_benchmark.json"
+
+def worker_counts():
+    """Powers of two up to the core count, plus the core count itself"""
+    cores = os.cpu_count() or 1
+    counts = [2 ** i for i in range(cores.bit_length()) if 2 ** i < cores]
+    return counts + [cores]
+
+def main():
+    try:
+        counts = [int(arg) for arg in sys.argv[1:]] or worker_counts()
+        texts = load_dataset("ag_news", split=f"test[:{NUM_TEXTS}]")["text"]
+        
+        results = []
+        for model_name in [TITLE_MODEL, CONTENT_MODEL, SUMMARY_MODEL]:
+            baseline = None
+            for workers in counts:
+                pool = EncodePool(workers)
+                try:
+                    # Load the model in the workers before timing
+                    pool.warmup(model_name)
+                    start_time = time.perf_counter()
+                    pool.encode(model_name, texts)
+                    elapsed = time.perf_counter() - start_time
+                finally:
+                    pool.close()
+                
+                throughput = len(texts) / elapsed
+                baseline = baseline or throughput
+                results.append({
+                    "model": model_name,
+                    "workers": workers,
+                    "texts_per_second": throughput,
+                    "speedup": throughput / baseline
+                })
+                print(f"{model_name} x{workers}: {throughput:.1f} texts/s ({throughput / baseline:.2f}x)")
+        
+        with open(OUTPUT_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {OUTPUT_PATH}")
+        
+    except Exception as e:
+        print(f"Error during benchmark: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from src.backends import create_manager
+from src.ground_truth import exact_knn, recall_at_k
+from src.local_index import LocalVectorIndex
+from src.config import GROUND_TRUTH_INDEX_PATH
+from datasets import load_dataset
+import json
+import os
+import time
+
+NUM_QUERIES = 200  # AG News test titles used as queries
+K = 10  # Recall is reported at this depth
+OUTPUT_PATH = "recall_report.json"
+
+def main():
+    try:
+        manager = create_manager(attach=True)
+        queries = [text.split("\n", 1)[0] for text in load_dataset("ag_news", split=f"test[:{NUM_QUERIES}]")["text"]]
+        leg_embeddings = manager._encode_queries(queries)
+        
+        report = {"num_queries": len(queries), "k": K, "legs": {}}
+        for name, (store, _, _), query_embeddings in zip(
+            ("title", "content", "summary"), manager._search_legs(), leg_embeddings
+        ):
+            # Reference embeddings come from the local index snapshot of the same dataset
+            reference = LocalVectorIndex.load(os.path.join(GROUND_TRUTH_INDEX_PATH, name))
+            
+            start_time = time.time()
+            rows, _ = exact_knn(reference.vectors, query_embeddings, K)
+            ground_truth_time = time.time() - start_time
+            true_ids = [[reference.ids[row] for row in query_rows] for query_rows in rows]
+            
+            # Search each leg on its own so recall is not blurred by the cross-store merge
+            timed_results = [manager._timed_search(store, embedding, K) for embedding in query_embeddings]
+            retrieved_ids = [[doc.metadata["id"] for doc, _ in results] for results, _ in timed_results]
+            recall = recall_at_k(retrieved_ids, true_ids, K)
+            search_ms = 1000 * sum(elapsed for _, elapsed in timed_results) / len(timed_results)
+            
+            report["legs"][name] = {
+                "num_vectors": len(reference),
+                "recall": recall,
+                "mean_search_time_ms": search_ms,
+                "ground_truth_time_s": ground_truth_time
+            }
+            print(f"{name}: recall@{K}={recall:.4f}, mean search time {search_ms:.2f}ms "
+                  f"(exact kNN over {len(reference)} vectors took {ground_truth_time:.2f}s)")
+        
+        with open(OUTPUT_PATH, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {OUTPUT_PATH}")
+        
+    except Exception as e:
+        print(f"Error during recall evaluation: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from src.langchain_manager import LangChainManager
+from src.backends import create_manager
 import time
 
 def main():
@@ -6,16 +6,12 @@ def main():
         print("Starting database setup with LangChain...")
         start_time = time.time()
         
-        # Initialize LangChain manager
-        manager = LangChainManager()
+        # Initialize manager for the configured backend
+        manager = create_manager()
         
-        # Load and process dataset
-        print("Loading and processing dataset...")
-        documents = manager.load_and_process_dataset()
-        
-        # Setup vector stores
-        print("Setting up vector stores...")
-        manager.setup_vectorstore(documents)
+        # Stream the dataset through parsing, embedding, enrichment and the vector store writers
+        print("Ingesting dataset...")
+        manager.ingest()
         
         print(f"Setup completed in {time.time() - start_time:.2f} seconds")
         
@@ -2,7 +2,7 @@ import streamlit as st
 import requests
 import pandas as pd
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 # API endpoint
 API_URL = "http://localhost:8000"
@@ -14,9 +14,13 @@ def format_metrics(metrics: Dict[str, Any]) -> None:
     with col1:
         st.metric("Total Time", f"{metrics['total_time_ms']:.2f}ms")
     with col2:
-        st.metric("Search Time", f"{metrics['search_time_ms']:.2f}ms")
+        st.metric("Search Time", f"{metrics.get('search_time_ms', 0.0):.2f}ms")
     with col3:
-        st.metric("Network Time", f"{metrics['network_time_ms']:.2f}ms")
+        # Streamed searches report how soon the first results arrived instead of queueing
+        if 'first_result_time_ms' in metrics:
+            st.metric("First Result", f"{metrics['first_result_time_ms']:.2f}ms")
+        else:
+            st.metric("Queue Time", f"{metrics.get('queue_time_ms', 0.0):.2f}ms")
 
 def display_result(result: Dict[str, Any]) -> None:
     """Display a single search result"""
@@ -41,6 +45,13 @@ def display_result(result: Dict[str, Any]) -> None:
         
         st.metric("Distance Score", f"{result['distance']:.4f}")
 
+def display_results(container, results: List[Dict[str, Any]]) -> None:
+    """Replace the contents of a container with a list of results"""
+    with container.container():
+        st.subheader(f"📝 Search Results ({len(results)} found)")
+        for result in results:
+            display_result(result)
+
 def main():
     st.set_page_config(
         page_title="Vector Search Demo",
@@ -69,23 +80,42 @@ def main():
     
     if st.button("Search") and query:
         try:
+            metrics_area = st.empty()
+            results_area = st.empty()
+            results_by_id = {}
+            
             with st.spinner("Searching..."):
-                # Make API request
-                response = requests.post(
-                    f"{API_URL}/search/semantic",
-                    json={"query": query, "limit": num_results}
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Display metrics
-                st.subheader("📊 Search Metrics")
-                format_metrics(data["metrics"])
-                
-                # Display results
-                st.subheader(f"📝 Search Results ({len(data['results'])} found)")
-                for result in data["results"]:
-                    display_result(result)
+                # Stream the search so the first store to answer is shown while the others finish
+                with requests.post(
+                    f"{API_URL}/search/semantic/stream",
+                    json={"query": query, "limit": num_results},
+                    stream=True
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        frame = json.loads(line)
+                        
+                        if frame["event"] == "results":
+                            for result in frame["results"]:
+                                results_by_id[result["id"]] = result
+                            partial = sorted(results_by_id.values(), key=lambda result: result["distance"])
+                            display_results(results_area, partial[:num_results])
+                        
+                        elif frame["event"] == "summary":
+                            # The summary holds the final ranking with each document's best distance
+                            ranked = [
+                                {**results_by_id[item["id"]], "distance": item["distance"]}
+                                for item in frame["ranking"]
+                            ]
+                            display_results(results_area, ranked)
+                            with metrics_area.container():
+                                st.subheader("📊 Search Metrics")
+                                format_metrics(frame["metrics"])
+                        
+                        elif frame["event"] == "error":
+                            raise RuntimeError(frame["detail"])
                 
         except requests.exceptions.RequestException as e:
             st.error(f"Error connecting to API: {str(e)}")
@@ -0,0 +1,16 @@
+from .config import SEARCH_BACKEND
+
+def create_manager(attach: bool = False):
+    """Create the search manager for the configured SEARCH_BACKEND, optionally attaching to existing stores"""
+    if SEARCH_BACKEND == "local":
+        from .local_manager import LocalLangChainManager
+        manager = LocalLangChainManager()
+    elif SEARCH_BACKEND == "zilliz":
+        from .langchain_manager import LangChainManager
+        manager = LangChainManager()
+    else:
+        raise ValueError(f"Unknown search backend: {SEARCH_BACKEND}")
+    
+    if attach:
+        manager.attach_vectorstores()
+    return manager
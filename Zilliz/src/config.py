@@ -7,6 +7,18 @@ load_dotenv()
 ZILLIZ_URI = os.getenv("ZILLIZ_URI")
 ZILLIZ_TOKEN = os.getenv("ZILLIZ_TOKEN")
 COLLECTION_NAME = "news_articles_enhanced"
+MILVUS_CONNECTION_ALIAS = "default"  # pymilvus connection shared by every collection
+
+# Backend Configuration
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "zilliz")  # "zilliz" or "local"
+LOCAL_INDEX_PATH = ".local_index"  # Directory the local vector stores are saved to
+LOCAL_SEARCH_MODE = "exact"  # "exact" brute force or "ivf" approximate search
+LOCAL_NPROBE = 8  # IVF lists probed per query in "ivf" mode
+
+# Recall Measurement Configuration
+GROUND_TRUTH_INDEX_PATH = LOCAL_INDEX_PATH  # Local index snapshot holding the reference embeddings
+GROUND_TRUTH_CHUNK_SIZE = 65536  # Reference vectors scored per step of the exact kNN scan
+RECALL_SAMPLE_RATE = 0.0  # Fraction of live queries checked against exact kNN (0 disables)
 
 # Google API Configuration
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -21,22 +33,81 @@ TITLE_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
 CONTENT_MODEL = 'sentence-transformers/all-mpnet-base-v2'
 SUMMARY_MODEL = 'intfloat/e5-large'
 
+# Encoder Backend Configuration
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")  # "torch", "int8", "onnx" or "onnx_int8"
+ENCODER_EXPORT_DIR = ".encoders"  # Where quantized ONNX exports are written
+ONNX_QUANTIZATION_CONFIG = "avx512_vnni"  # "arm64", "avx2", "avx512" or "avx512_vnni"
+ENCODE_WORKERS = int(os.getenv("ENCODE_WORKERS", "0"))  # Ingestion encoding processes, one model copy each; 0 encodes in-process
+ENCODE_CHUNK_SIZE = 32  # Texts sent to an encoding process per task
+
 BATCH_SIZE = 64
 
 # Index Configuration
-INDEX_PARAMS = {
-    "metric_type": "L2",
-    "index_type": "IVF_FLAT",
-    "params": {"nlist": 1024}
-}
+INDEX_METRIC = "L2"
+INDEX_PROFILE_PATH = "index_profiles.json"  # Tuned index settings keyed by leg and collection size, written by tune_index.py
+INDEX_TARGET_RECALL = 0.95  # tune_index.py picks the fastest setting reaching this recall@10
+INDEX_TUNING_COLLECTION = "index_tuning"  # Scratch collection the sweep builds each candidate index in
+
+# Multi-Vector Collection Configuration
+MULTI_VECTOR_COLLECTION = False  # Store all three vectors in one collection searched with one request
+MULTI_VECTOR_RANKER = "rrf"  # Server-side fusion: "rrf" or "weighted"
+MULTI_VECTOR_WEIGHTS = [0.3, 0.4, 0.3]  # Title, content, summary weights for the "weighted" ranker
+
+# Search Configuration
+SEARCH_WORKERS = 8  # At least one per vector store so all legs of a query run concurrently
+RESULT_FIELDS = ["title", "content", "summary", "keywords", "category", "metadata"]  # Returned when no projection is given
+FILTER_FIELDS = ["category", "source"]  # Scalar fields searches can be filtered on by exact match
+SCALAR_INDEX_TYPE = "INVERTED"  # Index built on each of FILTER_FIELDS so filter expressions avoid a scan
+
+# Hybrid Search Configuration
+KEYWORD_INDEX_PATH = ".keyword_index"  # Directory the BM25 index over title, content and keywords is saved to
+KEYWORD_FIELD_WEIGHTS = {"title": 2.0, "content": 1.0, "keywords": 2.0}  # Term frequency multiplier per field
+BM25_K1 = 1.2  # Term frequency saturation
+BM25_B = 0.75  # Document length normalization
+HYBRID_FUSION = "rrf"  # "rrf" rank fusion or "weighted" score fusion of dense and keyword results
+HYBRID_DENSE_WEIGHT = 0.5  # Dense share of the fused score for "weighted" fusion
+HYBRID_RRF_K = 60  # Rank offset for reciprocal rank fusion
+HYBRID_CANDIDATES = 100  # Results taken from each side before fusion
+HYBRID_KEYWORD_PREFILTER = True  # Restrict the dense search to the best keyword matches when there are enough
+HYBRID_PREFILTER_SIZE = 1000  # Keyword matches the dense search is restricted to
 
-SEARCH_PARAMS = {
-    "metric_type": "L2",
-    "params": {"nprobe": 16}
-}
+# Query Embedding Cache Configuration
+EMBEDDING_CACHE_SIZE = 10000  # Maximum number of cached query embeddings per model
+EMBEDDING_CACHE_TTL = 3600  # Seconds before a cached embedding expires
+
+# Result Cache Configuration
+RESULT_CACHE_SIZE = 10000  # Maximum number of cached result lists (0 disables the cache)
+RESULT_CACHE_TTL = 300  # Seconds before cached results expire
+RESULT_CACHE_THRESHOLD = 0.98  # Cosine similarity at which a cached query's results are reused (1.0 for exact repeats only)
+RESULT_CACHE_VERSION_PATH = ".result_cache_version"  # Touched after ingestion so running APIs drop stale results
+
+# API Concurrency Configuration
+MAX_CONCURRENT_SEARCHES = 8  # Searches executed at once in the worker thread pool
+MAX_QUEUED_SEARCHES = 64  # Requests allowed to wait for a slot before returning 503
+MAX_BATCH_QUERIES = 1000  # Largest query list accepted by the batch search endpoint
+WARMUP_ON_STARTUP = True  # Run a dummy encode before reporting ready
+
+# Latency Metrics Configuration
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]  # Histogram upper bounds in seconds
 
 # Dataset Configuration
 DATASET_NAME = "ag_news"
-NUM_SAMPLES = 100  # Total samples to process
+NUM_SAMPLES = 100  # Total samples to process; None ingests the full split
 INSERT_BATCH_SIZE = 100  # Number of records to insert at once
-LLM_BATCH_SIZE = 100  # Increased from 10 to 100 documents per LLM call 
\ No newline at end of file
+EMBEDDING_STORE_DIR = ".embedding_store"  # Local memory-mapped cache of document embeddings
+LLM_BATCH_SIZE = 100  # Increased from 10 to 100 documents per LLM call
+
+# Metadata Extraction Configuration
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # "gemini" or "fake" for offline runs
+LLM_MAX_CONCURRENCY = 4  # Extraction batches in flight at once
+LLM_REQUESTS_PER_MINUTE = 60  # LLM request budget
+LLM_TOKENS_PER_MINUTE = 100000  # Estimated prompt token budget
+LLM_MAX_RETRIES = 5  # Retries per batch before giving up
+LLM_RETRY_BACKOFF = 2.0  # Base seconds for exponential backoff between retries
+EXTRACTION_CACHE_PATH = ".extraction_cache.jsonl"  # Results keyed by document hash, used to resume
+
+# Ingestion Pipeline Configuration
+INGEST_STREAMING = True  # Stream the dataset from the hub instead of downloading the whole split first
+INGEST_BATCH_SIZE = max(LLM_BATCH_SIZE * LLM_MAX_CONCURRENCY, ENCODE_WORKERS * ENCODE_CHUNK_SIZE)  # Rows per pipeline batch, enough to keep every LLM worker and encoding process busy
+INGEST_QUEUE_SIZE = 4  # Batches buffered between pipeline stages, which bounds ingestion memory
+INGEST_CHECKPOINT_PATH = ".ingest_checkpoint.json"  # Rows written so far, used to resume an interrupted ingest 
\ No newline at end of file
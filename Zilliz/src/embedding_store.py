@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from .config import EMBEDDING_STORE_DIR
+
+class EmbeddingStore:
+    """Memory-mapped on-disk store of document embeddings for one model, keyed by content hash"""
+    
+    def __init__(self, model_name: str, dim: int, root: str = EMBEDDING_STORE_DIR):
+        self.model_name = model_name
+        self.dim = dim
+        self.directory = os.path.join(root, model_name.replace("/", "__"))
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.jsonl")
+        self._lock = threading.Lock()
+        
+        os.makedirs(self.directory, exist_ok=True)
+        self.rows = self._load_index()
+        self._truncate_orphans()
+        self.vectors = self._map_vectors()
+    
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Hash document text so changed content gets a fresh embedding"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def _load_index(self) -> Dict[str, int]:
+        """Read the hash -> row index, checking it belongs to this model"""
+        legacy_path = os.path.join(self.directory, "index.json")
+        if not os.path.exists(self.index_path) and os.path.exists(legacy_path):
+            # Stores written before the index became append-only are converted once
+            with open(legacy_path) as f:
+                index = json.load(f)
+            self._check_dim(index["dim"])
+            self._write_index(sorted(index["rows"], key=index["rows"].get))
+            os.remove(legacy_path)
+        if not os.path.exists(self.index_path):
+            self._write_index([])
+        
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        
+        # A torn last line from an interrupted append is cut off, so the next append starts on a fresh line
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            with open(self.index_path, "r+b") as f:
+                f.truncate(complete)
+        
+        lines = data[:complete].decode("utf-8").splitlines()
+        self._check_dim(json.loads(lines[0])["dim"])
+        return {json.loads(line): row for row, line in enumerate(lines[1:])}
+    
+    def _check_dim(self, dim: int):
+        """Refuse a store written with another embedding size"""
+        if dim != self.dim:
+            raise ValueError(f"Embedding store for {self.model_name} has dim {dim}, expected {self.dim}")
+    
+    def _write_index(self, hashes: List[str]):
+        """Atomically write a complete index: a header line, then one hash per stored row"""
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps({"model": self.model_name, "dim": self.dim}) + "\n")
+            f.writelines(json.dumps(h) + "\n" for h in hashes)
+        os.replace(tmp_path, self.index_path)
+    
+    def _truncate_orphans(self):
+        """Drop vectors appended by an interrupted run that never made it into the index"""
+        expected_size = len(self.rows) * self.dim * 4
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) > expected_size:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(expected_size)
+    
+    def _map_vectors(self) -> np.ndarray:
+        """Memory-map the vector file read-only"""
+        if not self.rows:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.rows), self.dim))
+    
+    def _append(self, hashes: List[str], vectors: np.ndarray):
+        """Append new vectors to the file, then append their hashes to the index"""
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        
+        # Only the new rows are written, so each batch costs the same however large the store grows
+        with open(self.index_path, "a") as f:
+            f.writelines(json.dumps(h) + "\n" for h in hashes)
+        for h in hashes:
+            self.rows[h] = len(self.rows)
+        
+        # Mapping reads no data, so remapping over the longer file is cheap
+        self.vectors = self._map_vectors()
+    
+    def encode(self, texts: List[str], encode_many: Callable[[List[str]], List[List[float]]]) -> np.ndarray:
+        """Return embeddings for texts, encoding only content not already stored"""
+        hashes = [self.content_hash(text) for text in texts]
+        
+        with self._lock:
+            # Encode each unseen text once, even if it repeats within the batch
+            missing = {}
+            for h, text in zip(hashes, texts):
+                if h not in self.rows and h not in missing:
+                    missing[h] = text
+            
+            if missing:
+                encoded = np.asarray(encode_many(list(missing.values())), dtype=np.float32)
+                self._append(list(missing), encoded.reshape(len(missing), self.dim))
+            
+            rows = np.fromiter((self.rows[h] for h in hashes), dtype=np.int64, count=len(hashes))
+            vectors = self.vectors
+        
+        # Contiguous rows come straight from the mapped file without a copy
+        if len(rows) and np.array_equal(rows, np.arange(rows[0], rows[0] + len(rows))):
+            return vectors[rows[0]:rows[0] + len(rows)]
+        return vectors[rows]
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+
+class StoredEmbeddings(Embeddings):
+    """LangChain embeddings wrapper that serves document vectors from an EmbeddingStore"""
+    
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore):
+        self.embeddings = embeddings
+        self.store = store
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.store.encode(texts, self.embeddings.embed_documents).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
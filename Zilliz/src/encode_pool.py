@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+import multiprocessing
+import os
+import numpy as np
+from .config import ENCODER_BACKEND, ENCODE_WORKERS, ENCODE_CHUNK_SIZE
+from .encoders import load_encoder
+
+# Encoders loaded in this worker process, keyed by model name
+_worker_models: Dict[str, object] = {}
+_worker_backend = ENCODER_BACKEND
+
+def _init_worker(backend: str, threads: int):
+    """Split the cores between workers so they do not oversubscribe the CPU"""
+    global _worker_backend
+    _worker_backend = backend
+    
+    import torch
+    torch.set_num_threads(threads)
+
+def _encode_chunk(model_name: str, texts: List[str]) -> np.ndarray:
+    """Encode one chunk in a worker, loading the model on its first use there"""
+    model = _worker_models.get(model_name)
+    if model is None:
+        model = _worker_models[model_name] = load_encoder(model_name, _worker_backend)
+    return np.asarray(model.encode(texts, batch_size=len(texts)), dtype=np.float32)
+
+class EncodePool:
+    """Process pool that shards encoding across cores, with one copy of each model per worker"""
+    
+    def __init__(self, workers: int = ENCODE_WORKERS, chunk_size: int = ENCODE_CHUNK_SIZE, backend: str = ENCODER_BACKEND):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        
+        # Spawn rather than fork, since the parent already runs torch and pipeline threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend, max(1, (os.cpu_count() or 1) // workers))
+        )
+    
+    def encode(self, model_name: str, texts: List[str]) -> np.ndarray:
+        """Encode texts across the workers, returning embeddings in input order"""
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        if not chunks:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        # map yields results in submission order whatever order the workers finish in
+        return np.concatenate(list(self.executor.map(_encode_chunk, [model_name] * len(chunks), chunks)))
+    
+    def warmup(self, model_name: str):
+        """Send one small task per worker so models are loaded before timing-sensitive work starts"""
+        list(self.executor.map(_encode_chunk, [model_name] * self.workers, [["warm up"]] * self.workers))
+    
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,186 @@
+from langchain.schema import Document
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from typing import List, Dict, Any, Optional
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from .config import (
+    LLM_BATCH_SIZE,
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BACKOFF,
+    EXTRACTION_CACHE_PATH
+)
+
+class RateLimiter:
+    """Token-bucket limiter on LLM requests and estimated prompt tokens per minute"""
+    
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE):
+        self.capacity = {"requests": float(requests_per_minute), "tokens": float(tokens_per_minute)}
+        self.available = dict(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        for name, capacity in self.capacity.items():
+            self.available[name] = min(capacity, self.available[name] + elapsed * capacity / 60.0)
+    
+    def acquire(self, requests: int = 1, tokens: int = 0):
+        """Block until the requested budget is available, then consume it"""
+        # Never ask for more than a full bucket, or the wait would never end
+        wanted = {
+            "requests": min(float(requests), self.capacity["requests"]),
+            "tokens": min(float(tokens), self.capacity["tokens"])
+        }
+        while True:
+            with self._lock:
+                self._refill()
+                shortfall = max(
+                    (wanted[name] - self.available[name]) * 60.0 / self.capacity[name]
+                    for name in wanted
+                )
+                if shortfall <= 0:
+                    for name in wanted:
+                        self.available[name] -= wanted[name]
+                    return
+            time.sleep(shortfall)
+
+class ExtractionCache:
+    """Append-only JSONL file of extraction results keyed by document hash"""
+    
+    def __init__(self, path: str = EXTRACTION_CACHE_PATH):
+        self.path = path
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    # A torn last line from an interrupted run is simply skipped
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.results[entry["hash"]] = entry["result"]
+    
+    @staticmethod
+    def document_hash(doc: Document) -> str:
+        """Hash the text the LLM sees so edited documents are extracted again"""
+        return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+    
+    def get(self, doc_hash: str) -> Optional[Dict[str, Any]]:
+        return self.results.get(doc_hash)
+    
+    def put_many(self, entries: Dict[str, Dict[str, Any]]):
+        """Record results in memory and append them to the cache file"""
+        with self._lock:
+            with open(self.path, "a") as f:
+                for doc_hash, result in entries.items():
+                    f.write(json.dumps({"hash": doc_hash, "result": result}, default=str) + "\n")
+            self.results.update(entries)
+
+class FakeExtractionChain:
+    """Deterministic offline stand-in for the Gemini extraction chain"""
+    
+    def invoke(self, doc: Document) -> Dict[str, Any]:
+        words = re.findall(r"[a-z]{4,}", doc.page_content.lower())
+        keywords = [word for word, _ in Counter(words).most_common(5)]
+        return {
+            "summary": doc.page_content[:150],
+            "keywords": ", ".join(keywords),
+            "metadata": {
+                "tone": "neutral",
+                "complexity": "medium",
+                "target_audience": "general",
+                "main_topic": keywords[0] if keywords else ""
+            }
+        }
+    
+    def batch(self, docs: List[Document]) -> List[Dict[str, Any]]:
+        return [self.invoke(doc) for doc in docs]
+
+class MetadataExtractor:
+    """Runs the extraction chain over documents with bounded concurrency, rate limiting, retries and a resumable cache"""
+    
+    def __init__(
+        self,
+        chain,
+        batch_size: int = LLM_BATCH_SIZE,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ExtractionCache] = None,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff: float = LLM_RETRY_BACKOFF
+    ):
+        self.chain = chain
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache or ExtractionCache()
+        self.max_retries = max_retries
+        self.backoff = backoff
+    
+    def _extract_batch(self, batch: List[Document], hashes: List[str]):
+        """Extract one batch, retrying with exponential backoff and jitter"""
+        # Roughly four characters per token is enough for budgeting
+        tokens = sum(len(doc.page_content) // 4 for doc in batch)
+        
+        for attempt in range(self.max_retries + 1):
+            # Every attempt is a new set of requests, so retries draw from the budget too
+            self.rate_limiter.acquire(len(batch), tokens)
+            try:
+                results = self.chain.batch(batch)
+                break
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+        
+        self.cache.put_many(dict(zip(hashes, results)))
+    
+    def extract(self, documents: List[Document]) -> List[Document]:
+        """Add extracted metadata to documents, skipping any already in the cache"""
+        hashes = [self.cache.document_hash(doc) for doc in documents]
+        
+        # Only documents without a cached result go to the LLM
+        pending = {}
+        for doc, doc_hash in zip(documents, hashes):
+            if self.cache.get(doc_hash) is None and doc_hash not in pending:
+                pending[doc_hash] = doc
+        print(f"Extracting metadata for {len(pending)} of {len(documents)} documents")
+        
+        pending_hashes = list(pending)
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = []
+            for i in range(0, len(pending_hashes), self.batch_size):
+                batch_hashes = pending_hashes[i:i + self.batch_size]
+                futures.append(executor.submit(
+                    self._extract_batch, [pending[h] for h in batch_hashes], batch_hashes
+                ))
+            
+            # Keep going past failed batches so every success is cached for the next run
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+        
+        if errors:
+            raise RuntimeError(
+                f"{len(errors)} extraction batches failed; completed batches are cached, rerun to resume"
+            ) from errors[0]
+        
+        for doc, doc_hash in zip(documents, hashes):
+            doc.metadata.update(self.cache.get(doc_hash))
+        return documents
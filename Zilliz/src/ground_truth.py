@@ -0,0 +1,89 @@
+import os
+import random
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .config import GROUND_TRUTH_CHUNK_SIZE, GROUND_TRUTH_INDEX_PATH, RECALL_SAMPLE_RATE
+from .local_index import LocalVectorIndex
+
+def exact_knn(vectors: np.ndarray, queries, k: int, chunk_size: int = GROUND_TRUTH_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-k rows and squared L2 distances for each query, streaming over the vectors in chunks"""
+    queries = np.asarray(queries, dtype=np.float32)
+    queries = queries.reshape(-1, vectors.shape[1])
+    query_norms = np.einsum("ij,ij->i", queries, queries)
+    k = min(k, len(vectors))
+    
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    best_distances = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        # Only one chunk of the (possibly memory-mapped) matrix is resident at a time
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        chunk_norms = np.einsum("ij,ij->i", chunk, chunk)
+        distances = chunk_norms[None, :] - 2.0 * (queries @ chunk.T) + query_norms[:, None]
+        
+        # Merge this chunk's candidates with the running top-k
+        rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + len(chunk)), distances.shape)], axis=1)
+        distances = np.concatenate([best_distances, distances], axis=1)
+        
+        # Early merges can hold fewer than k candidates when chunks are smaller than k
+        kept = min(k, distances.shape[1])
+        top = np.argpartition(distances, kept - 1, axis=1)[:, :kept]
+        best_rows = np.take_along_axis(rows, top, axis=1)
+        best_distances = np.take_along_axis(distances, top, axis=1)
+    
+    order = np.argsort(best_distances, axis=1)
+    return np.take_along_axis(best_rows, order, axis=1), np.maximum(np.take_along_axis(best_distances, order, axis=1), 0.0)
+
+def recall_at_k(retrieved_ids: List[List[Any]], true_ids: List[List[Any]], k: int) -> float:
+    """Mean fraction of each query's true top-k found in its retrieved top-k"""
+    if not true_ids:
+        return 0.0
+    return float(np.mean([
+        len(set(retrieved[:k]) & set(truth[:k])) / max(1, len(truth[:k]))
+        for retrieved, truth in zip(retrieved_ids, true_ids)
+    ]))
+
+class RecallEstimator:
+    """Estimates online recall by checking a random sample of live queries against exact kNN"""
+    
+    def __init__(self, reference_paths: Dict[str, str], sample_rate: float = RECALL_SAMPLE_RATE):
+        self.reference_paths = reference_paths
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self.total_recall = 0.0
+        self._references: Dict[str, Optional[LocalVectorIndex]] = {}
+        self._lock = threading.Lock()
+    
+    def _reference(self, name: str) -> Optional[LocalVectorIndex]:
+        """Load the saved local index for a reference set on first use"""
+        if name not in self._references:
+            path = self.reference_paths[name]
+            exists = os.path.exists(os.path.join(path, "meta.json"))
+            self._references[name] = LocalVectorIndex.load(path) if exists else None
+        return self._references[name]
+    
+    def maybe_observe(self, name: str, query_embedding: List[float], retrieved_ids: List[Any], k: int):
+        """With probability sample_rate, score one query's results against exact kNN"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        
+        reference = self._reference(name)
+        if reference is None or len(reference) == 0:
+            return
+        
+        rows, _ = exact_knn(reference.vectors, query_embedding, k)
+        true_ids = [reference.ids[row] for row in rows[0]]
+        recall = recall_at_k([retrieved_ids], [true_ids], k)
+        with self._lock:
+            self.samples += 1
+            self.total_recall += recall
+    
+    def estimate(self) -> Optional[float]:
+        """Running mean recall over all sampled queries, or None before the first sample"""
+        with self._lock:
+            return self.total_recall / self.samples if self.samples else None
+
+# Process-wide estimator with one reference set per search leg
+recall_estimator = RecallEstimator({
+    name: os.path.join(GROUND_TRUTH_INDEX_PATH, name) for name in ("title", "content", "summary")
+})
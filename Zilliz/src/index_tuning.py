@@ -0,0 +1,141 @@
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from .config import INDEX_METRIC, INDEX_PROFILE_PATH, FILTER_FIELDS, SCALAR_INDEX_TYPE
+
+INDEX_TYPES = ["IVF_FLAT", "IVF_SQ8", "HNSW"]
+
+def default_index_params(num_vectors: int, index_type: str = "IVF_FLAT") -> Dict[str, Any]:
+    """Build params sized to the collection, never with more IVF lists than vectors"""
+    if index_type == "HNSW":
+        return {"metric_type": INDEX_METRIC, "index_type": index_type, "params": {"M": 16, "efConstruction": 200}}
+    nlist = max(1, min(int(4 * math.sqrt(max(num_vectors, 1))), num_vectors, 65536))
+    return {"metric_type": INDEX_METRIC, "index_type": index_type, "params": {"nlist": nlist}}
+
+def default_search_params(index_params: Dict[str, Any], k: int = 10) -> Dict[str, Any]:
+    """Search params for an index without a tuned profile"""
+    if index_params["index_type"] == "HNSW":
+        return {"metric_type": INDEX_METRIC, "params": {"ef": max(64, k)}}
+    nlist = int(index_params["params"]["nlist"])
+    return {"metric_type": INDEX_METRIC, "params": {"nprobe": min(nlist, max(8, nlist // 32))}}
+
+def _read_profiles(path: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Read the profile file, which maps each leg to its profiles keyed by collection size"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def load_index_profiles(leg: str, path: str = INDEX_PROFILE_PATH) -> Dict[int, Dict[str, Any]]:
+    """Read the tuned profiles of one leg keyed by the collection size they were tuned on"""
+    return {int(size): profile for size, profile in _read_profiles(path).get(leg, {}).items()}
+
+def save_index_profile(leg: str, num_vectors: int, profile: Dict[str, Any], path: str = INDEX_PROFILE_PATH):
+    """Add or replace the profile of one leg for one collection size"""
+    all_profiles = _read_profiles(path)
+    profiles = load_index_profiles(leg, path)
+    profiles[num_vectors] = profile
+    all_profiles[leg] = {str(size): profiles[size] for size in sorted(profiles)}
+    with open(path, "w") as f:
+        json.dump(all_profiles, f, indent=2)
+
+def field_leg(field: str) -> str:
+    """Name of the leg a vector field of the multi-vector collection belongs to"""
+    return field[:-len("_vector")] if field.endswith("_vector") else field
+
+def index_settings(leg: str, num_vectors: int, path: str = INDEX_PROFILE_PATH) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return (index params, search params) from the leg's profile closest in size, or sized defaults without one"""
+    # Legs use different models and dimensions, so one leg's profile never applies to another
+    profiles = load_index_profiles(leg, path)
+    if not profiles:
+        index_params = default_index_params(num_vectors)
+        return index_params, default_search_params(index_params)
+    
+    # Sizes are compared on a log scale, so 10k is as close to 1k as to 100k
+    size = min(profiles, key=lambda size: abs(math.log(max(size, 1)) - math.log(max(num_vectors, 1))))
+    index_params = dict(profiles[size]["index_params"])
+    if "nlist" in index_params["params"]:
+        # A profile tuned on a larger collection must not ask for more lists than there are vectors
+        nlist = max(1, min(int(index_params["params"]["nlist"]), num_vectors))
+        index_params["params"] = {**index_params["params"], "nlist": nlist}
+        search_params = profiles[size]["search_params"]
+        nprobe = min(int(search_params["params"]["nprobe"]), nlist)
+        return index_params, {**search_params, "params": {**search_params["params"], "nprobe": nprobe}}
+    return index_params, profiles[size]["search_params"]
+
+def search_settings(
+    leg: str, index_params: Optional[Dict[str, Any]], num_vectors: int, path: str = INDEX_PROFILE_PATH
+) -> Optional[Dict[str, Any]]:
+    """Search params for an index that already exists, tuned only when the profile would build the same index"""
+    # Indexes this module did not build, such as AUTOINDEX, keep the engine's own defaults
+    if index_params is None or index_params.get("index_type") not in INDEX_TYPES:
+        return None
+    
+    tuned_index, tuned_search = index_settings(leg, num_vectors, path)
+    if tuned_index["index_type"] == index_params["index_type"] and {
+        key: str(value) for key, value in tuned_index["params"].items()
+    } == {key: str(value) for key, value in index_params["params"].items()}:
+        return tuned_search
+    return default_search_params(index_params)
+
+def built_index_params(collection, field: str) -> Optional[Dict[str, Any]]:
+    """Return the params of the index on one field of a pymilvus collection, if it has one"""
+    for index in collection.indexes:
+        if index.field_name == field:
+            return index.params
+    return None
+
+def build_index(collection, field: str, leg: str) -> Dict[str, Any]:
+    """Replace the index on one field with the leg's settings for the collection's size, returning the search params"""
+    collection.flush()
+    index_params, search_params = index_settings(leg, collection.num_entities)
+    existing = [index for index in collection.indexes if index.field_name == field]
+    if existing:
+        collection.release()
+        collection.drop_index(index_name=existing[0].index_name)
+    collection.create_index(field, index_params)
+    return search_params
+
+def build_scalar_indexes(collection, fields: List[str] = FILTER_FIELDS):
+    """Index the filterable scalar fields so filter expressions are resolved without scanning every row"""
+    indexed = {index.field_name for index in collection.indexes}
+    columns = {field.name for field in collection.schema.fields}
+    for field in fields:
+        if field in columns and field not in indexed:
+            collection.create_index(field, {"index_type": SCALAR_INDEX_TYPE}, index_name=f"{field}_index")
+
+def sweep_grid(num_vectors: int, k: int, index_types: List[str] = INDEX_TYPES) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Return each candidate index with the search params to try on it, sized to the collection"""
+    grid = []
+    root = math.sqrt(max(num_vectors, 1))
+    nlists = sorted({max(1, min(int(root * scale), num_vectors)) for scale in (1, 2, 4, 8)})
+    for index_type in [index_type for index_type in index_types if index_type != "HNSW"]:
+        for nlist in nlists:
+            nprobes = sorted({min(nprobe, nlist) for nprobe in (1, 4, 8, 16, 32, 64, 128, 256)})
+            grid.append((
+                {"metric_type": INDEX_METRIC, "index_type": index_type, "params": {"nlist": nlist}},
+                [{"metric_type": INDEX_METRIC, "params": {"nprobe": nprobe}} for nprobe in nprobes]
+            ))
+    if "HNSW" in index_types:
+        for m in (8, 16, 32):
+            grid.append((
+                {"metric_type": INDEX_METRIC, "index_type": "HNSW", "params": {"M": m, "efConstruction": 200}},
+                [{"metric_type": INDEX_METRIC, "params": {"ef": ef}} for ef in (16, 32, 64, 128, 256) if ef >= k]
+            ))
+    return grid
+
+def pareto_frontier(points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep the points no other point beats on both recall and QPS, ordered by recall"""
+    frontier = []
+    for point in sorted(points, key=lambda point: (-point["qps"], -point["recall"])):
+        if not frontier or point["recall"] > frontier[-1]["recall"]:
+            frontier.append(point)
+    return sorted(frontier, key=lambda point: point["recall"])
+
+def choose_setting(frontier: List[Dict[str, Any]], target_recall: float) -> Dict[str, Any]:
+    """Pick the fastest frontier point reaching the target recall, or the most accurate one if none does"""
+    reaching = [point for point in frontier if point["recall"] >= target_recall]
+    if reaching:
+        return max(reaching, key=lambda point: point["qps"])
+    return max(frontier, key=lambda point: point["recall"])
@@ -0,0 +1,155 @@
+import json
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .config import BM25_K1, BM25_B, KEYWORD_FIELD_WEIGHTS, FILTER_FIELDS
+
+# Words too common to say anything about a news article
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have he her his in is it its of on or that the their they this to was "
+    "were will with said says after over new more than who not but".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, without stopwords and single characters"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+class KeywordIndex:
+    """In-process BM25 inverted index over the title, content and keywords of each document"""
+    
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[Any] = []
+        self.lengths = np.empty(0, dtype=np.float32)
+        
+        # Filterable field values of every row, so keyword matches honour the same filters as dense search
+        self.attributes: Dict[str, List[Any]] = {field: [] for field in FILTER_FIELDS}
+        
+        # Postings of every term stored back to back: rows and weighted term frequencies
+        self.terms: Dict[str, int] = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.rows = np.empty(0, dtype=np.int32)
+        self.frequencies = np.empty(0, dtype=np.float32)
+        
+        # Postings added since the last finalize, merged into the arrays above on demand
+        self._pending: Dict[str, List[Tuple[int, float]]] = {}
+        self._pending_lengths: List[float] = []
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def add(self, documents: Iterable[Dict[str, Any]]):
+        """Index documents given as dicts with an id and any of the weighted text fields"""
+        for document in documents:
+            row = len(self.ids)
+            counts = Counter()
+            for field, weight in KEYWORD_FIELD_WEIGHTS.items():
+                for token in tokenize(document.get(field) or ""):
+                    counts[token] += weight
+            
+            self.ids.append(document["id"])
+            for field, values in self.attributes.items():
+                values.append(document.get(field))
+            self._pending_lengths.append(sum(counts.values()))
+            for token, frequency in counts.items():
+                self._pending.setdefault(token, []).append((row, frequency))
+    
+    def finalize(self):
+        """Merge pending postings into the contiguous per-term arrays"""
+        if not self._pending:
+            return
+        
+        postings = {term: [] for term in self.terms}
+        for term, index in self.terms.items():
+            start, end = self.offsets[index], self.offsets[index + 1]
+            postings[term].append((self.rows[start:end], self.frequencies[start:end]))
+        for term, pending in self._pending.items():
+            rows, frequencies = zip(*pending)
+            postings.setdefault(term, []).append(
+                (np.asarray(rows, dtype=np.int32), np.asarray(frequencies, dtype=np.float32))
+            )
+        
+        self.terms = {term: index for index, term in enumerate(sorted(postings))}
+        parts = [postings[term] for term in self.terms]
+        self.rows = np.concatenate([rows for part in parts for rows, _ in part])
+        self.frequencies = np.concatenate([frequencies for part in parts for _, frequencies in part])
+        self.offsets = np.concatenate([[0], np.cumsum([sum(len(rows) for rows, _ in part) for part in parts])])
+        self.lengths = np.concatenate([self.lengths, np.asarray(self._pending_lengths, dtype=np.float32)])
+        self._pending = {}
+        self._pending_lengths = []
+    
+    def search(self, query: str, k: int, filters: Optional[Dict[str, Any]] = None) -> List[Tuple[Any, float]]:
+        """Return (id, BM25 score) pairs for the k best matching documents, best first"""
+        unknown_filters = set(filters or {}) - set(FILTER_FIELDS)
+        if unknown_filters:
+            raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown_filters))}")
+        
+        self.finalize()
+        n = len(self)
+        if n == 0:
+            return []
+        
+        scores = np.zeros(n, dtype=np.float32)
+        average_length = float(self.lengths.mean()) or 1.0
+        for term in set(tokenize(query)):
+            index = self.terms.get(term)
+            if index is None:
+                continue
+            
+            start, end = self.offsets[index], self.offsets[index + 1]
+            rows, frequencies = self.rows[start:end], self.frequencies[start:end]
+            idf = np.log(1.0 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+            norms = self.k1 * (1.0 - self.b + self.b * self.lengths[rows] / average_length)
+            scores[rows] += idf * frequencies * (self.k1 + 1.0) / (frequencies + norms)
+        
+        # Only documents sharing at least one term with the query are matches
+        matches = np.flatnonzero(scores)
+        for field, value in (filters or {}).items():
+            values = self.attributes[field]
+            matches = matches[[values[row] == value for row in matches]]
+        if len(matches) > k:
+            matches = matches[np.argpartition(-scores[matches], k - 1)[:k]]
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        return [(self.ids[row], float(scores[row])) for row in matches]
+    
+    def save(self, path: str):
+        """Write the index to a directory"""
+        self.finalize()
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "lengths.npy"), self.lengths)
+        np.save(os.path.join(path, "offsets.npy"), self.offsets)
+        np.save(os.path.join(path, "rows.npy"), self.rows)
+        np.save(os.path.join(path, "frequencies.npy"), self.frequencies)
+        
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "ids": self.ids,
+                "attributes": self.attributes,
+                "terms": sorted(self.terms, key=self.terms.get)
+            }, f)
+    
+    @classmethod
+    def load(cls, path: str) -> "KeywordIndex":
+        """Read an index written by save"""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        
+        index = cls(meta["k1"], meta["b"])
+        index.ids = meta["ids"]
+        index.attributes = meta.get("attributes", {field: [None] * len(index.ids) for field in FILTER_FIELDS})
+        index.terms = {term: i for i, term in enumerate(meta["terms"])}
+        index.lengths = np.load(os.path.join(path, "lengths.npy"))
+        index.offsets = np.load(os.path.join(path, "offsets.npy"))
+        index.rows = np.load(os.path.join(path, "rows.npy"))
+        index.frequencies = np.load(os.path.join(path, "frequencies.npy"))
+        return index
+    
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """Whether an index has been saved to a directory"""
+        return os.path.exists(os.path.join(path, "meta.json"))
@@ -1,38 +1,110 @@
 from langchain_google_genai import GoogleGenerativeAI
 from langchain_community.vectorstores import Milvus
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from pymilvus import connections, utility
+from langchain_core.embeddings import Embeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from langchain.prompts import PromptTemplate
 from langchain.chains import create_extraction_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from datasets import load_dataset
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional
+import json
+import time
 from .config import (
     GOOGLE_API_KEY,
     ZILLIZ_URI,
     ZILLIZ_TOKEN,
     COLLECTION_NAME,
+    DATASET_NAME,
     NUM_SAMPLES,
+    INGEST_BATCH_SIZE,
     TITLE_MODEL,
     CONTENT_MODEL,
-    SUMMARY_MODEL
+    SUMMARY_MODEL,
+    TITLE_VECTOR_DIM,
+    CONTENT_VECTOR_DIM,
+    SUMMARY_VECTOR_DIM,
+    SEARCH_WORKERS,
+    RESULT_FIELDS,
+    MULTI_VECTOR_COLLECTION,
+    LLM_BACKEND,
+    MILVUS_CONNECTION_ALIAS,
+    ENCODE_WORKERS,
+    KEYWORD_INDEX_PATH,
+    HYBRID_FUSION,
+    HYBRID_DENSE_WEIGHT,
+    HYBRID_RRF_K,
+    HYBRID_CANDIDATES,
+    HYBRID_KEYWORD_PREFILTER,
+    HYBRID_PREFILTER_SIZE,
+    FILTER_FIELDS
 )
+from .embedding_cache import query_embedding_cache
+from .embedding_store import EmbeddingStore, StoredEmbeddings
+from .encoders import SentenceTransformerEmbeddings
+from .encode_pool import EncodePool
+from .multi_vector_store import MultiVectorStore, SCALAR_FIELDS
+from .extraction import MetadataExtractor, FakeExtractionChain
+from .ground_truth import recall_estimator
+from .keyword_index import KeywordIndex
+from .index_tuning import build_index, build_scalar_indexes, built_index_params, search_settings
+from .result_cache import result_cache
+from .ingestion import IngestCheckpoint, read_dataset, run_pipeline
+from .metrics import stage_timer
+
+# Names of the search legs, in the order _search_legs returns them
+LEG_NAMES = ["title", "content", "summary"]
 
 class LangChainManager:
     def __init__(self):
-        # Initialize LLM
+        # The LLM is only needed for ingestion, so it is created on first use
+        self.llm = None
+        self.extraction_chain = None
+        
+        # Initialize embeddings on the configured inference backend
+        self.title_embeddings = SentenceTransformerEmbeddings(TITLE_MODEL)
+        self.content_embeddings = SentenceTransformerEmbeddings(CONTENT_MODEL)
+        self.summary_embeddings = SentenceTransformerEmbeddings(SUMMARY_MODEL)
+        
+        # Persistent document embeddings reused across ingestion runs
+        self.title_document_embeddings = StoredEmbeddings(
+            self.title_embeddings, EmbeddingStore(TITLE_MODEL, TITLE_VECTOR_DIM)
+        )
+        self.content_document_embeddings = StoredEmbeddings(
+            self.content_embeddings, EmbeddingStore(CONTENT_MODEL, CONTENT_VECTOR_DIM)
+        )
+        self.summary_document_embeddings = StoredEmbeddings(
+            self.summary_embeddings, EmbeddingStore(SUMMARY_MODEL, SUMMARY_VECTOR_DIM)
+        )
+        
+        # Thread pool used to fan searches out across the vector stores
+        self.search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS)
+        
+        # Single collection holding all three vectors, used when MULTI_VECTOR_COLLECTION is set
+        self.multi_store = None
+        
+        # LangChain reuses an open pymilvus connection to the same address, so every store shares one
+        self.connection_args = {"uri": ZILLIZ_URI, "token": ZILLIZ_TOKEN}
+        
+        # BM25 index over title, content and keywords used by hybrid search, built at the end of ingest
+        self.keyword_index = None
+        self.keyword_index_path = KEYWORD_INDEX_PATH
+    
+    def _init_llm(self):
+        """Initialize the LLM, text splitter and metadata extraction chain"""
+        if LLM_BACKEND == "fake":
+            # Deterministic local stand-in for offline runs and tests
+            self.llm = None
+            self.extraction_chain = FakeExtractionChain()
+            return
+        
         self.llm = GoogleGenerativeAI(
             model="gemini-1.5-pro",
             google_api_key=GOOGLE_API_KEY,
             temperature=0.1
         )
         
-        # Initialize embeddings
-        self.title_embeddings = HuggingFaceEmbeddings(model_name=TITLE_MODEL)
-        self.content_embeddings = HuggingFaceEmbeddings(model_name=CONTENT_MODEL)
-        self.summary_embeddings = HuggingFaceEmbeddings(model_name=SUMMARY_MODEL)
-        
         # Initialize text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=500,
@@ -54,94 +126,657 @@ class LangChainManager:
         
         self.extraction_chain = create_extraction_chain(self.extraction_prompt, self.llm)
     
-    def load_and_process_dataset(self):
-        """Load AG News dataset and process with LangChain"""
-        # Load dataset
-        dataset = load_dataset("ag_news", split=f"train[:{NUM_SAMPLES}]")
-        
-        # Process documents in batches
+    def warmup(self):
+        """Run a dummy encode with every model so the first query does not pay for lazy initialization"""
+        for embeddings in (self.title_embeddings, self.content_embeddings, self.summary_embeddings):
+            embeddings.embed_query("warm up")
+    
+    def _parse_batch(self, rows: List[Dict[str, Any]], offset: int) -> List[Document]:
+        """Turn one batch of dataset rows into LangChain documents"""
         documents = []
-        for item in dataset:
-            text = item["text"]
+        for j, row in enumerate(rows):
+            text = row["text"]
             title = text.split("\n", 1)[0][:500]
             content = text.split("\n", 1)[1] if "\n" in text else text
             
             # Create document
-            doc = Document(
+            documents.append(Document(
                 page_content=content,
                 metadata={
-                    "id": len(documents),
+                    "id": offset + j,
                     "title": title,
-                    "category": item["label"],
+                    "category": row["label"],
                     "source": "ag_news"
                 }
+            ))
+        return documents
+    
+    def _embed_batch(self, documents: List[Document], offset: int) -> List[Document]:
+        """Embed a batch with every model into the persistent stores, so the writers only read the vectors back"""
+        texts = [doc.page_content for doc in documents]
+        for embeddings in (self.title_document_embeddings, self.content_document_embeddings, self.summary_document_embeddings):
+            embeddings.embed_documents(texts)
+        return documents
+    
+    def _enrich_batch(self, documents: List[Document], offset: int) -> List[Document]:
+        """Add LLM-extracted metadata in concurrent, rate-limited calls, resuming from cached results"""
+        # Enrichment is skipped when no LLM is configured
+        if self.extraction_chain is None:
+            return documents
+        return self.extractor.extract(documents)
+    
+    def ingest(self, resume: bool = True):
+        """Stream AG News through parse, embed, enrich and write stages that run at once with bounded buffers"""
+        # Initialize LLM and metadata extraction
+        self._init_llm()
+        if self.extraction_chain is not None:
+            self.extractor = MetadataExtractor(self.extraction_chain)
+        
+        checkpoint = None
+        start = 0
+        if resume:
+            checkpoint = IngestCheckpoint({
+                "dataset": DATASET_NAME,
+                "num_samples": NUM_SAMPLES,
+                "target": COLLECTION_NAME,
+                "multi_vector": MULTI_VECTOR_COLLECTION
+            })
+            start = checkpoint.load()
+            if start:
+                print(f"Resuming ingestion after {start} rows")
+        
+        self._open_stores(start)
+        
+        # Share one process pool between the three models, so each worker holds a copy of each
+        encoders = (self.title_embeddings, self.content_embeddings, self.summary_embeddings)
+        pool = EncodePool() if ENCODE_WORKERS > 0 else None
+        for embeddings in encoders:
+            embeddings.pool = pool
+        try:
+            run_pipeline(
+                read_dataset(DATASET_NAME, "train", NUM_SAMPLES, INGEST_BATCH_SIZE, start),
+                [
+                    ("parse", self._parse_batch),
+                    ("embed", self._embed_batch),
+                    ("enrich", self._enrich_batch),
+                    ("write", self._write_documents)
+                ],
+                checkpoint
+            )
+        finally:
+            for embeddings in encoders:
+                embeddings.pool = None
+            if pool is not None:
+                pool.close()
+        self._close_stores()
+        self.build_keyword_index()
+        
+        if checkpoint is not None:
+            checkpoint.clear()
+        
+        # Cached results predate the new documents
+        result_cache.invalidate()
+    
+    def _open_stores(self, start: int):
+        """Create empty stores for each embedding type, or reopen them when resuming after start rows"""
+        # Existing collections are only kept when resuming an interrupted ingest
+        resume = start > 0
+        if MULTI_VECTOR_COLLECTION:
+            # One collection with a vector field per embedding type
+            self.multi_store = MultiVectorStore.create(
+                COLLECTION_NAME,
+                [TITLE_VECTOR_DIM, CONTENT_VECTOR_DIM, SUMMARY_VECTOR_DIM],
+                connection_args=self.connection_args,
+                alias=MILVUS_CONNECTION_ALIAS,
+                drop_old=not resume
+            )
+            if resume:
+                # Drop rows of a batch that was cut off mid-write so it is not inserted twice
+                self.multi_store.col.delete(f"id >= {start}")
+            return
+        
+        for name, embeddings in zip(
+            LEG_NAMES,
+            (self.title_document_embeddings, self.content_document_embeddings, self.summary_document_embeddings)
+        ):
+            # The collection itself is created by the first insert, once the vector dimension is known
+            store = Milvus(
+                embeddings,
+                collection_name=f"{COLLECTION_NAME}_{name}",
+                connection_args=self.connection_args,
+                drop_old=not resume
             )
-            documents.append(doc)
+            if resume and store.col is not None:
+                store.col.delete(f"id >= {start}")
+            setattr(self, f"{name}_store", store)
+    
+    def _write_documents(self, documents: List[Document], offset: int):
+        """Insert one batch of documents into every store"""
+        if self.multi_store is not None:
+            self.multi_store.insert(
+                documents,
+                [self.title_document_embeddings, self.content_document_embeddings, self.summary_document_embeddings]
+            )
+        else:
+            ids = [str(doc.metadata["id"]) for doc in documents]
+            for store, _, _ in self._search_legs():
+                store.add_documents(documents, ids=ids)
+        print(f"Inserted documents {offset} to {offset + len(documents)}")
+    
+    def _close_stores(self):
+        """Index every collection for its final size once every batch is in"""
+        if self.multi_store is not None:
+            self.multi_store.finalize()
+            return
+        
+        # LangChain indexes each collection when it is created, before its size is known
+        for leg, (store, _, _) in zip(LEG_NAMES, self._search_legs()):
+            store.search_params = build_index(store.col, store._vector_field, leg)
+            build_scalar_indexes(store.col)
+            store.col.load()
+    
+    def build_keyword_index(self):
+        """Build the BM25 index over every stored document and save it for hybrid search"""
+        # Reading the documents back from the stores also covers rows written before a resumed ingest
+        index = KeywordIndex()
+        for documents in self._iter_stored_documents():
+            index.add(documents)
+        index.save(self.keyword_index_path)
+        self.keyword_index = index
+        print(f"Indexed keywords of {len(index)} documents to {self.keyword_index_path}")
+    
+    def _iter_stored_documents(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches of id, title, content, keywords and filter fields read back from the content or multi-vector collection"""
+        if self.multi_store is not None:
+            collection, text_field = self.multi_store.col, "content"
+        else:
+            collection, text_field = self.content_store.col, self.content_store._text_field
+        
+        # Keywords only become a column when metadata extraction ran
+        columns = {field.name for field in collection.schema.fields}
+        output_fields = ["id", "title", text_field] + [
+            field for field in ["keywords"] + FILTER_FIELDS if field in columns
+        ]
+        
+        iterator = collection.query_iterator(batch_size=INGEST_BATCH_SIZE, expr="id >= 0", output_fields=output_fields)
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                yield [
+                    {
+                        "id": row["id"],
+                        "title": row["title"],
+                        "content": row[text_field],
+                        **{field: row.get(field) for field in ["keywords"] + FILTER_FIELDS}
+                    }
+                    for row in rows
+                ]
+        finally:
+            iterator.close()
+    
+    def _attach_keyword_index(self):
+        """Load the BM25 index saved by ingest, leaving hybrid search unavailable when there is none"""
+        if KeywordIndex.exists(self.keyword_index_path):
+            self.keyword_index = KeywordIndex.load(self.keyword_index_path)
+        else:
+            print(f"No keyword index at {self.keyword_index_path}; hybrid search is unavailable")
+    
+    def attach_vectorstores(self):
+        """Attach to the collections written by a previous ingest run without re-ingesting"""
+        connections.connect(alias=MILVUS_CONNECTION_ALIAS, **self.connection_args)
+        self._attach_keyword_index()
         
-        # Process with LLM in batches
-        processed_docs = []
-        for i in range(0, len(documents), 10):
-            batch = documents[i:i+10]
-            results = self.extraction_chain.batch(batch)
+        if MULTI_VECTOR_COLLECTION:
+            self.multi_store = MultiVectorStore(COLLECTION_NAME, self.connection_args, MILVUS_CONNECTION_ALIAS)
+            self.multi_store.col.load()
+            return
+        
+        for name, embeddings in (
+            ("title", self.title_document_embeddings),
+            ("content", self.content_document_embeddings),
+            ("summary", self.summary_document_embeddings)
+        ):
+            collection_name = f"{COLLECTION_NAME}_{name}"
+            if not utility.has_collection(collection_name, using=MILVUS_CONNECTION_ALIAS):
+                raise RuntimeError(f"Collection {collection_name} does not exist; run setup_database.py first")
             
-            for doc, result in zip(batch, results):
-                doc.metadata.update(result)
-                processed_docs.append(doc)
-        
-        return processed_docs
-    
-    def setup_vectorstore(self, documents: List[Document]):
-        """Initialize Milvus/Zilliz vector stores for each embedding type"""
-        # Create vector stores
-        self.title_store = Milvus.from_documents(
-            documents,
-            self.title_embeddings,
-            collection_name=f"{COLLECTION_NAME}_title",
-            connection_args={"uri": ZILLIZ_URI, "token": ZILLIZ_TOKEN}
-        )
+            # Attaching loads the existing collection into memory if it is not loaded yet
+            store = Milvus(embeddings, collection_name=collection_name, connection_args=self.connection_args)
+            
+            # Use the tuned search params for the index the collection was built with, else LangChain's defaults
+            search_params = search_settings(name, built_index_params(store.col, store._vector_field), store.col.num_entities)
+            if search_params is not None:
+                store.search_params = search_params
+            setattr(self, f"{name}_store", store)
+        print(f"Attached to existing {COLLECTION_NAME} collections")
+    
+    def _format_result(self, doc: Document, score: float, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Shape a LangChain document and its score into an API result with the requested fields"""
+        values = {
+            "title": lambda: doc.metadata["title"],
+            "content": lambda: doc.page_content,
+            "summary": lambda: doc.metadata.get("summary", ""),
+            "keywords": lambda: doc.metadata.get("keywords", ""),
+            "category": lambda: doc.metadata["category"],
+            "metadata": lambda: doc.metadata.get("metadata", {})
+        }
+        fields = RESULT_FIELDS if fields is None else fields
+        return {
+            "id": doc.metadata["id"],
+            **{field: values[field]() for field in fields},
+            "distance": score
+        }
+    
+    def _search_store(
+        self, store: Milvus, embeddings: Embeddings, model_name: str, query: str, k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Encode the query for one store, reusing cached embeddings, and search it, timing each stage"""
+        timings = {}
+        with stage_timer(timings, "encode"):
+            embedding = query_embedding_cache.get_or_compute(model_name, query, embeddings.embed_query)
         
-        self.content_store = Milvus.from_documents(
-            documents,
-            self.content_embeddings,
-            collection_name=f"{COLLECTION_NAME}_content",
-            connection_args={"uri": ZILLIZ_URI, "token": ZILLIZ_TOKEN}
-        )
+        # The store call also builds the LangChain documents, so that counts as part of the request
+        with stage_timer(timings, "db_request"):
+            results = self._search_candidates(store, embedding, k, filters=filters)
         
-        self.summary_store = Milvus.from_documents(
-            documents,
-            self.summary_embeddings,
-            collection_name=f"{COLLECTION_NAME}_summary",
-            connection_args={"uri": ZILLIZ_URI, "token": ZILLIZ_TOKEN}
-        )
+        # Score a sample of live queries against exact kNN for the online recall estimate
+        if not filters:
+            leg_name = {TITLE_MODEL: "title", CONTENT_MODEL: "content", SUMMARY_MODEL: "summary"}[model_name]
+            recall_estimator.maybe_observe(leg_name, embedding, [doc.metadata["id"] for doc, _ in results], k)
+        
+        return results, timings
     
-    def semantic_search(self, query: str, k: int = 5):
-        """Perform semantic search across all vector stores"""
-        # Search each store
-        title_results = self.title_store.similarity_search_with_score(query, k=k)
-        content_results = self.content_store.similarity_search_with_score(query, k=k)
-        summary_results = self.summary_store.similarity_search_with_score(query, k=k)
-        
-        # Combine and sort results
-        all_results = []
-        for doc, score in title_results + content_results + summary_results:
-            all_results.append({
-                "id": doc.metadata["id"],
-                "title": doc.metadata["title"],
-                "content": doc.page_content,
-                "summary": doc.metadata.get("summary", ""),
-                "keywords": doc.metadata.get("keywords", ""),
-                "category": doc.metadata["category"],
-                "metadata": doc.metadata.get("metadata", {}),
-                "distance": score
-            })
+    def _timed_search(self, store: Milvus, embedding: List[float], k: int, filters: Optional[Dict[str, Any]] = None):
+        """Search one store by vector and report how long the call took"""
+        start_time = time.perf_counter()
+        results = self._search_candidates(store, embedding, k, filters=filters)
+        return results, time.perf_counter() - start_time
+    
+    def _filter_expr(self, filters: Optional[Dict[str, Any]] = None, candidate_ids: Optional[List[int]] = None) -> Optional[str]:
+        """Build the boolean expression Milvus evaluates against its scalar indexes before the vector search"""
+        filters = filters or {}
+        unknown_filters = set(filters) - set(FILTER_FIELDS)
+        if unknown_filters:
+            raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown_filters))}")
+        
+        # JSON quoting doubles as Milvus string literal quoting
+        clauses = [f"{field} == {json.dumps(value)}" for field, value in filters.items()]
+        if candidate_ids is not None:
+            clauses.append(f"id in {list(candidate_ids)}")
+        return " and ".join(clauses) or None
+    
+    def _search_candidates(
+        self, store: Milvus, embedding: List[float], k: int,
+        candidate_ids: Optional[List[int]] = None, filters: Optional[Dict[str, Any]] = None
+    ):
+        """Search one store by vector, only among documents matching the filters and candidate ids when given"""
+        expr = self._filter_expr(filters, candidate_ids)
+        if expr is None:
+            return store.similarity_search_with_score_by_vector(embedding, k=k)
+        return store.similarity_search_with_score_by_vector(embedding, k=k, expr=expr)
+    
+    def _search_legs(self):
+        """Return the (store, embeddings, model name) triple for each search leg"""
+        return [
+            (self.title_store, self.title_embeddings, TITLE_MODEL),
+            (self.content_store, self.content_embeddings, CONTENT_MODEL),
+            (self.summary_store, self.summary_embeddings, SUMMARY_MODEL)
+        ]
+    
+    def _rank_results(self, leg_results, k: int):
+        """Deduplicate leg results, keeping the best distance per id, and return the k best (doc, score) pairs"""
+        best_results = {}
+        for results in leg_results:
+            for doc, score in results:
+                current = best_results.get(doc.metadata["id"])
+                if current is None or score < current[1]:
+                    best_results[doc.metadata["id"]] = (doc, score)
+        return sorted(best_results.values(), key=lambda x: x[1])[:k]
+    
+    def _merge_results(self, leg_results, k: int, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Merge and deduplicate leg results, then shape only the results that are returned"""
+        return [self._format_result(doc, score, fields) for doc, score in self._rank_results(leg_results, k)]
+    
+    def get_documents(self, ids: List[int], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch documents by id with a single query against the content or multi-vector collection"""
+        # Milvus rejects an empty id list, and there is nothing to fetch anyway
+        if not ids:
+            return []
+        fields = RESULT_FIELDS if fields is None else fields
+        
+        # LangChain stores page content in its text field and metadata keys as columns
+        if self.multi_store is not None:
+            collection, text_field = self.multi_store.col, "content"
+        else:
+            collection, text_field = self.content_store.col, self.content_store._text_field
+        output_fields = ["id"] + [text_field if field == "content" else field for field in fields]
+        rows = collection.query(expr=f"id in {list(ids)}", output_fields=output_fields)
+        
+        by_id = {row["id"]: row for row in rows}
+        return [
+            {"id": doc_id, **{field: by_id[doc_id].get(text_field if field == "content" else field) for field in fields}}
+            for doc_id in ids if doc_id in by_id
+        ]
+    
+    def _encode_queries(self, queries: List[str]) -> List[List[List[float]]]:
+        """Encode queries with every model, one call per model, running the models concurrently"""
+        encode_futures = [
+            self.search_executor.submit(
+                query_embedding_cache.get_or_compute_many, model_name, queries, embeddings.embed_documents
+            )
+            for _, embeddings, model_name in self._search_legs()
+        ]
+        return [future.result() for future in encode_futures]
+    
+    def _multi_vector_search(
+        self, queries: List[str], k: int, fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None
+    ):
+        """Search all three vector fields of the single collection in one request"""
+        timings = {}
+        with stage_timer(timings, "encode"):
+            leg_embeddings = self._encode_queries(queries)
+        
+        # Only ask Milvus for the fields the caller will return
+        fields = RESULT_FIELDS if fields is None else fields
+        output_fields = [field for field in SCALAR_FIELDS if field in fields]
+        
+        with stage_timer(timings, "db_request"):
+            query_results = self.multi_store.hybrid_search(leg_embeddings, k, output_fields, self._filter_expr(filters))
+        
+        # Every query shares the single request, and is shaped on its own
+        batch_results = []
+        for results in query_results:
+            query_timings = {"db_request": timings["db_request"]}
+            with stage_timer(query_timings, "materialize"):
+                formatted_results = [self._format_result(doc, score, fields) for doc, score in results]
+            batch_results.append((formatted_results, query_timings))
+        return batch_results, timings["encode"]
+    
+    def _cached_results(
+        self, queries: List[str], k: int, fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None
+    ):
+        """Look queries up in the result cache by their title embedding, timing the lookup of each one"""
+        # The title model is the cheapest, and its embedding is reused by the title leg on a miss
+        timings = {}
+        with stage_timer(timings, "encode"):
+            keys = query_embedding_cache.get_or_compute_many(TITLE_MODEL, queries, self.title_embeddings.embed_documents)
+        
+        namespace = self._cache_namespace(fields, filters)
+        cached = []
+        for key in keys:
+            query_timings = {}
+            with stage_timer(query_timings, "cache"):
+                results = result_cache.get(namespace, key, k)
+            cached.append((results, query_timings))
+        return keys, cached, timings["encode"]
+    
+    def _cache_namespace(self, fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None):
+        """Results are only shared between searches that return the same fields under the same filters"""
+        return ("semantic", tuple(RESULT_FIELDS if fields is None else fields), tuple(sorted((filters or {}).items())))
+    
+    def _summary_frame(self, results: List[Dict[str, Any]], timings: Dict[str, float]) -> Dict[str, Any]:
+        """Build the closing frame of a single-query stream from its final results"""
+        return {
+            "event": "summary",
+            "ranking": [{"id": result["id"], "distance": result["distance"]} for result in results],
+            "num_results": len(results),
+            "timings": timings
+        }
+    
+    def semantic_search(
+        self, query: str, k: int = 5, fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None
+    ):
+        """Perform semantic search across all vector stores, returning results and per-stage timings in seconds"""
+        keys, cached, encode_time = self._cached_results([query], k, fields, filters)
+        results, timings = cached[0]
+        timings["encode"] = encode_time
+        if results is not None:
+            return results, timings
+        
+        results, search_timings = self._semantic_search(query, k, fields, filters)
+        result_cache.put(self._cache_namespace(fields, filters), keys[0], k, results)
+        
+        # The cache lookup runs before the search, so its stages add up
+        for stage, seconds in search_timings.items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+        return results, timings
+    
+    def _semantic_search(
+        self, query: str, k: int, fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None
+    ):
+        """Search all vector stores without consulting the result cache"""
+        if self.multi_store is not None:
+            batch_results, encode_time = self._multi_vector_search([query], k, fields, filters)
+            results, timings = batch_results[0]
+            return results, {"encode": encode_time, **timings}
+        
+        # Encode and search each store concurrently
+        futures = [
+            self.search_executor.submit(self._search_store, store, embeddings, model_name, query, k, filters)
+            for store, embeddings, model_name in self._search_legs()
+        ]
+        
+        leg_results, timings = [], {}
+        for future in as_completed(futures):
+            results, leg_timings = future.result()
+            leg_results.append(results)
+            
+            # Legs run concurrently, so each stage costs as much as its slowest leg
+            for stage, seconds in leg_timings.items():
+                timings[stage] = max(timings.get(stage, 0.0), seconds)
+        
+        with stage_timer(timings, "materialize"):
+            results = self._merge_results(leg_results, k, fields)
+        return results, timings
+    
+    def semantic_search_stream(
+        self, query: str, k: int = 5, fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield each store's results as soon as it answers, then a summary frame with the merged ranking"""
+        if self.multi_store is not None:
+            # The legs are fused server-side in one request, so there is nothing to send early
+            results, timings = self.semantic_search(query, k, fields, filters)
+            yield {"event": "results", "leg": "multi_vector", "results": results}
+            yield self._summary_frame(results, timings)
+            return
         
-        # Sort and deduplicate
-        all_results.sort(key=lambda x: x["distance"])
-        seen_ids = set()
-        unique_results = []
-        for result in all_results:
-            if result["id"] not in seen_ids and len(unique_results) < k:
-                seen_ids.add(result["id"])
-                unique_results.append(result)
+        keys, cached, encode_time = self._cached_results([query], k, fields, filters)
+        results, timings = cached[0]
+        timings["encode"] = encode_time
+        if results is not None:
+            yield {"event": "results", "leg": "cache", "results": results}
+            yield self._summary_frame(results, timings)
+            return
+        
+        futures = {
+            self.search_executor.submit(self._search_store, store, embeddings, model_name, query, k, filters): leg
+            for leg, (store, embeddings, model_name) in zip(LEG_NAMES, self._search_legs())
+        }
+        
+        leg_results, search_timings, sent_ids = [], {}, set()
+        for future in as_completed(futures):
+            results, leg_timings = future.result()
+            leg_results.append(results)
+            for stage, seconds in leg_timings.items():
+                search_timings[stage] = max(search_timings.get(stage, 0.0), seconds)
+            
+            # Send only documents no earlier leg has sent; the summary carries each one's best distance
+            with stage_timer(search_timings, "materialize"):
+                new_results = [
+                    self._format_result(doc, score, fields)
+                    for doc, score in results if doc.metadata["id"] not in sent_ids
+                ]
+            sent_ids.update(result["id"] for result in new_results)
+            yield {"event": "results", "leg": futures[future], "results": new_results}
+        
+        with stage_timer(search_timings, "materialize"):
+            results = self._merge_results(leg_results, k, fields)
+        result_cache.put(self._cache_namespace(fields, filters), keys[0], k, results)
+        
+        for stage, seconds in search_timings.items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+        yield self._summary_frame(results, timings)
+    
+    def hybrid_search(
+        self, query: str, k: int = 5, fields: Optional[List[str]] = None,
+        fusion: str = HYBRID_FUSION, keyword_prefilter: bool = HYBRID_KEYWORD_PREFILTER,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Fuse dense search results with BM25 keyword matches, returning results and per-stage timings in seconds"""
+        if self.keyword_index is None:
+            raise RuntimeError("Keyword index does not exist; run setup_database.py first")
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"Unknown hybrid fusion: {fusion}")
+        
+        timings = {}
+        with stage_timer(timings, "keyword"):
+            keyword_results = self.keyword_index.search(
+                query, max(HYBRID_PREFILTER_SIZE if keyword_prefilter else 0, HYBRID_CANDIDATES), filters
+            )
+        
+        # Prune the dense search to the keyword matches only when they can fill its candidate list
+        candidate_ids = None
+        if keyword_prefilter and len(keyword_results) >= HYBRID_CANDIDATES:
+            candidate_ids = [doc_id for doc_id, _ in keyword_results]
+        
+        with stage_timer(timings, "encode"):
+            leg_embeddings = [embeddings[0] for embeddings in self._encode_queries([query])]
+        with stage_timer(timings, "db_request"):
+            dense_results = self._dense_candidates(leg_embeddings, HYBRID_CANDIDATES, candidate_ids, fields, filters)
+        
+        with stage_timer(timings, "materialize"):
+            fused = self._fuse_results(dense_results, keyword_results[:HYBRID_CANDIDATES], k, fusion)
+            results = self._hybrid_results(fused, dense_results, fields)
+        return results, timings
+    
+    def _dense_candidates(
+        self, leg_embeddings: List[List[float]], k: int,
+        candidate_ids: Optional[List[int]] = None, fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Return the k best (doc, distance) pairs across every leg, optionally among candidate ids only"""
+        if self.multi_store is not None:
+            fields = RESULT_FIELDS if fields is None else fields
+            output_fields = [field for field in SCALAR_FIELDS if field in fields]
+            expr = self._filter_expr(filters, candidate_ids)
+            return self.multi_store.hybrid_search([[embedding] for embedding in leg_embeddings], k, output_fields, expr)[0]
+        
+        futures = [
+            self.search_executor.submit(self._search_candidates, store, embedding, k, candidate_ids, filters)
+            for (store, _, _), embedding in zip(self._search_legs(), leg_embeddings)
+        ]
+        return self._rank_results([future.result() for future in futures], k)
+    
+    def _fuse_results(self, dense_results, keyword_results, k: int, fusion: str):
+        """Fuse dense (doc, distance) and keyword (id, score) rankings into the k best (id, score) pairs, scores in [0, 1]"""
+        dense_ids = [doc.metadata["id"] for doc, _ in dense_results]
+        keyword_ids = [doc_id for doc_id, _ in keyword_results]
+        scores = {}
+        
+        if fusion == "rrf":
+            # Reciprocal rank fusion, scaled so a document ranked first on both sides scores 1
+            for ranking in (dense_ids, keyword_ids):
+                for rank, doc_id in enumerate(ranking):
+                    scores[doc_id] = scores.get(doc_id, 0.0) + (HYBRID_RRF_K + 1) / (2 * (HYBRID_RRF_K + rank + 1))
+        else:
+            # Min-max normalize each side, flipping distances so larger is better on both
+            if dense_results:
+                distances = [distance for _, distance in dense_results]
+                low, spread = min(distances), (max(distances) - min(distances)) or 1.0
+                for doc_id, distance in zip(dense_ids, distances):
+                    scores[doc_id] = HYBRID_DENSE_WEIGHT * (1.0 - (distance - low) / spread)
+            if keyword_results:
+                best = keyword_results[0][1]
+                for doc_id, score in keyword_results:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + (1.0 - HYBRID_DENSE_WEIGHT) * score / best
+        
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+    
+    def _hybrid_results(self, fused, dense_results, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Shape fused results, fetching the documents only the keyword side found"""
+        dense_docs = {doc.metadata["id"]: doc for doc, _ in dense_results}
+        missing = [doc_id for doc_id, _ in fused if doc_id not in dense_docs]
+        fetched = {document["id"]: document for document in self.get_documents(missing, fields)} if missing else {}
+        
+        # Fused scores are similarities; report 1 - score so smaller stays better like per-store distances
+        results = []
+        for doc_id, score in fused:
+            if doc_id in dense_docs:
+                results.append(self._format_result(dense_docs[doc_id], 1.0 - score, fields))
+            elif doc_id in fetched:
+                results.append({**fetched[doc_id], "distance": 1.0 - score})
+        return results
+    
+    def semantic_search_batch(
+        self, queries: List[str], k: int = 5, fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None
+    ):
+        """Perform semantic search for many queries with one encoding call per model"""
+        batch_results = [None] * len(queries)
+        for frame in self.semantic_search_batch_stream(queries, k, fields, filters):
+            if frame["event"] == "response":
+                batch_results[frame["index"]] = (frame["results"], frame["timings"])
+            else:
+                encode_time = frame["timings"]["encode"]
+        return batch_results, encode_time
+    
+    def semantic_search_batch_stream(
+        self, queries: List[str], k: int = 5, fields: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield each query's merged results as soon as all of its legs finish, then a summary frame"""
+        # Cached queries are answered first; only the rest are encoded with every model and searched
+        keys, cached, encode_time = self._cached_results(queries, k, fields, filters)
+        namespace = self._cache_namespace(fields, filters)
+        missing = []
+        for i, (results, timings) in enumerate(cached):
+            if results is None:
+                missing.append(i)
+            else:
+                yield {"event": "response", "index": i, "results": results, "timings": timings}
+        
+        if missing and self.multi_store is not None:
+            # All remaining queries go out as a single multi-vector request; each reports its time
+            batch_results, search_encode_time = self._multi_vector_search([queries[i] for i in missing], k, fields, filters)
+            encode_time += search_encode_time
+            for i, (results, timings) in zip(missing, batch_results):
+                result_cache.put(namespace, keys[i], k, results)
+                yield {"event": "response", "index": i, "results": results, "timings": {**cached[i][1], **timings}}
+        
+        elif missing:
+            legs = self._search_legs()
+            
+            # Encode all uncached queries for each model
+            encode_timings = {}
+            with stage_timer(encode_timings, "encode"):
+                leg_embeddings = self._encode_queries([queries[i] for i in missing])
+            encode_time += encode_timings["encode"]
+            
+            # Issue every (query, store) search concurrently
+            futures = {
+                self.search_executor.submit(self._timed_search, store, leg_embeddings[j][m], k, filters): i
+                for m, i in enumerate(missing)
+                for j, (store, _, _) in enumerate(legs)
+            }
+            
+            timed_results = {i: [] for i in missing}
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    timed_results[i].append(future.result())
+                    if len(timed_results[i]) < len(legs):
+                        continue
+                    
+                    # Legs run concurrently, so a query costs as much as its slowest leg
+                    timings = {**cached[i][1], "db_request": max(elapsed for _, elapsed in timed_results[i])}
+                    with stage_timer(timings, "materialize"):
+                        results = self._merge_results((results for results, _ in timed_results[i]), k, fields)
+                    result_cache.put(namespace, keys[i], k, results)
+                    yield {"event": "response", "index": i, "results": results, "timings": timings}
+            finally:
+                # Drop searches that have not started if the client goes away early
+                for future in futures:
+                    future.cancel()
         
-        return unique_results 
\ No newline at end of file
+        yield {"event": "summary", "num_queries": len(queries), "timings": {"encode": encode_time}}
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from .config import MAX_CONCURRENT_SEARCHES, MAX_QUEUED_SEARCHES
+
+class SearchQueueFull(Exception):
+    """Raised when a search is rejected because the wait queue is full"""
+
+class SearchLimiter:
+    """Runs blocking search calls off the event loop with bounded concurrency and queueing"""
+    
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_SEARCHES, max_queued: int = MAX_QUEUED_SEARCHES):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+    
+    def _check_queue(self):
+        """Apply backpressure instead of letting the queue grow without bound"""
+        if self._semaphore.locked() and self.waiting >= self.max_queued:
+            raise SearchQueueFull(f"Search queue is full ({self.max_queued} requests waiting)")
+    
+    async def _acquire(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+    
+    def _release(self):
+        self.active -= 1
+        self._semaphore.release()
+    
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Wait for a free slot, then run func in the worker thread pool"""
+        self._check_queue()
+        await self._acquire()
+        try:
+            return await run_in_threadpool(func, *args, **kwargs)
+        finally:
+            self._release()
+    
+    def stream(self, func: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """Iterate the generator func returns in the worker thread pool, holding one slot until it is done"""
+        # Reject before the response starts so the client gets a 503 rather than a broken stream
+        self._check_queue()
+        return self._stream(func, *args, **kwargs)
+    
+    async def _stream(self, func: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        await self._acquire()
+        try:
+            async for item in iterate_in_threadpool(func(*args, **kwargs)):
+                yield item
+        finally:
+            self._release()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return current concurrency and queue depth"""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued
+        }
+
+# Process-wide limiter shared by all search endpoints
+search_limiter = SearchLimiter()
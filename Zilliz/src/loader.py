@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from .config import WARMUP_ON_STARTUP
+
+# Reference point for cold-start time, taken when the API module is first imported
+PROCESS_START = time.perf_counter()
+
+class ManagerNotReady(Exception):
+    """Raised when a request needs the manager before it has finished loading"""
+
+class ManagerLoader:
+    """Builds the search manager in a background thread so the API can bind its port immediately"""
+    
+    def __init__(self, factory: Callable[[], Any], warmup: bool = WARMUP_ON_STARTUP):
+        self.factory = factory
+        self.warmup = warmup
+        self.manager = None
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start loading the manager unless loading is already under way"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="manager-loader", daemon=True)
+            self._thread.start()
+    
+    def _load(self):
+        try:
+            load_start = time.perf_counter()
+            manager = self.factory()
+            self.timings["load_seconds"] = time.perf_counter() - load_start
+            
+            # Run a dummy encode so the first real request skips one-off allocation costs
+            if self.warmup:
+                warmup_start = time.perf_counter()
+                manager.warmup()
+                self.timings["warmup_seconds"] = time.perf_counter() - warmup_start
+            
+            self.manager = manager
+            self.timings["cold_start_seconds"] = time.perf_counter() - PROCESS_START
+            print(f"Manager ready after {self.timings['cold_start_seconds']:.2f}s")
+        except Exception as e:
+            self.error = str(e)
+            print(f"Manager failed to load: {e}")
+    
+    def get(self):
+        """Return the loaded manager or raise ManagerNotReady"""
+        if self.manager is None:
+            raise ManagerNotReady(self.error or "Search service is still starting")
+        return self.manager
+    
+    def status(self) -> Dict[str, Any]:
+        """Report readiness, any load error and the measured startup timings"""
+        return {
+            "ready": self.manager is not None,
+            "error": self.error,
+            **self.timings
+        }
@@ -0,0 +1,153 @@
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from typing import List, Dict, Any, Iterator, Optional
+import os
+import numpy as np
+from .config import (
+    GOOGLE_API_KEY,
+    LLM_BACKEND,
+    TITLE_VECTOR_DIM,
+    CONTENT_VECTOR_DIM,
+    SUMMARY_VECTOR_DIM,
+    LOCAL_INDEX_PATH,
+    LOCAL_SEARCH_MODE,
+    LOCAL_NPROBE,
+    INGEST_BATCH_SIZE,
+    FILTER_FIELDS
+)
+from .langchain_manager import LangChainManager
+from .local_index import LocalVectorIndex
+
+class LocalVectorStore:
+    """Exposes a LocalVectorIndex through the Milvus vector store search interface"""
+    
+    def __init__(self, index: LocalVectorIndex):
+        self.index = index
+    
+    @classmethod
+    def create(cls, dim: int) -> "LocalVectorStore":
+        """Create an empty local store"""
+        # Milvus reports squared L2, so match it for comparable scores
+        return cls(LocalVectorIndex(dim, metric="l2_squared"))
+    
+    def add_documents(self, documents: List[Document], embeddings: Embeddings):
+        """Embed documents and append them to the index"""
+        vectors = embeddings.embed_documents([doc.page_content for doc in documents])
+        self.index.add(
+            [doc.metadata["id"] for doc in documents],
+            vectors,
+            [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents]
+        )
+    
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, ids: Optional[List[Any]] = None,
+        filters: Optional[Dict[str, Any]] = None, **kwargs
+    ):
+        """Return (document, distance) pairs for the k nearest documents, only among ids and filter matches when given"""
+        if ids is None and not filters:
+            return self._documents(self.index.search(embedding, k, mode=LOCAL_SEARCH_MODE, nprobe=LOCAL_NPROBE))
+        
+        # Candidate sets are small, so they are searched exactly
+        rows = np.arange(len(self.index))
+        if ids is not None:
+            id_rows = self.index.id_rows
+            rows = np.asarray(sorted({id_rows[doc_id] for doc_id in ids if doc_id in id_rows}), dtype=np.int64)
+        if filters:
+            matches = self.index.filter_rows(filters, value=lambda payload, field: payload["metadata"].get(field))
+            rows = np.intersect1d(rows, matches, assume_unique=True)
+        return self._documents(self.index.search_rows(embedding, k, rows))
+    
+    def _documents(self, hits):
+        """Wrap (payload, distance) hits as LangChain (document, distance) pairs"""
+        return [
+            (Document(page_content=payload["page_content"], metadata=payload["metadata"]), distance)
+            for payload, distance in hits
+        ]
+
+class LocalLangChainManager(LangChainManager):
+    """In-process stand-in for LangChainManager backed by local vector indexes"""
+    
+    def __init__(self, index_path: str = LOCAL_INDEX_PATH):
+        super().__init__()
+        self.index_path = index_path
+        self.keyword_index_path = os.path.join(index_path, "keywords")
+    
+    def attach_vectorstores(self):
+        """Load the stores saved by a previous ingest run"""
+        for name in ("title", "content", "summary"):
+            store_path = os.path.join(self.index_path, name)
+            if not os.path.exists(os.path.join(store_path, "meta.json")):
+                raise RuntimeError(f"Local store {store_path} does not exist; run setup_database.py first")
+            setattr(self, f"{name}_store", LocalVectorStore(LocalVectorIndex.load(store_path)))
+        self._attach_keyword_index()
+    
+    def _init_llm(self):
+        """Initialize metadata extraction only when an LLM is configured"""
+        if GOOGLE_API_KEY or LLM_BACKEND == "fake":
+            super()._init_llm()
+        else:
+            self.llm = None
+            self.extraction_chain = None
+    
+    def ingest(self, resume: bool = False):
+        """Build and save a local vector store for each embedding type"""
+        # The stores are only saved at the end, so there is never a partial ingest to resume
+        super().ingest(resume=False)
+    
+    def _open_stores(self, start: int):
+        """Create an empty local store for each embedding type"""
+        self.title_store = LocalVectorStore.create(TITLE_VECTOR_DIM)
+        self.content_store = LocalVectorStore.create(CONTENT_VECTOR_DIM)
+        self.summary_store = LocalVectorStore.create(SUMMARY_VECTOR_DIM)
+    
+    def _write_documents(self, documents: List[Document], offset: int):
+        """Append one batch of documents to every local store"""
+        for store, embeddings in (
+            (self.title_store, self.title_document_embeddings),
+            (self.content_store, self.content_document_embeddings),
+            (self.summary_store, self.summary_document_embeddings)
+        ):
+            store.add_documents(documents, embeddings)
+        print(f"Indexed documents {offset} to {offset + len(documents)}")
+    
+    def _close_stores(self):
+        """Build the IVF lists of every store and save them"""
+        for name in ("title", "content", "summary"):
+            store = getattr(self, f"{name}_store")
+            store.index.build_ivf()
+            store.index.save(os.path.join(self.index_path, name))
+        print(f"Saved local vector stores to {self.index_path}")
+    
+    def _iter_stored_documents(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches of id, title, content, keywords and filter fields from the local content store"""
+        payloads = self.content_store.index.payloads
+        for start in range(0, len(payloads), INGEST_BATCH_SIZE):
+            yield [
+                {
+                    "id": payload["metadata"]["id"],
+                    "title": payload["metadata"]["title"],
+                    "content": payload["page_content"],
+                    **{field: payload["metadata"].get(field) for field in ["keywords"] + FILTER_FIELDS}
+                }
+                for payload in payloads[start:start + INGEST_BATCH_SIZE]
+            ]
+    
+    def _search_candidates(
+        self, store: LocalVectorStore, embedding: List[float], k: int, candidate_ids=None, filters=None
+    ):
+        """Search one local store, exactly among the candidate ids and filter matches when there are any"""
+        # Builds the Milvus expression only to reject unknown filter fields the same way
+        self._filter_expr(filters)
+        return store.similarity_search_with_score_by_vector(embedding, k=k, ids=candidate_ids, filters=filters)
+    
+    def get_documents(self, ids: List[int], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch documents by id from the local content store, in the order requested"""
+        index = self.content_store.index
+        
+        documents = []
+        for doc_id in ids:
+            if doc_id in index.id_rows:
+                document = self._format_result(Document(**index.payloads[index.id_rows[doc_id]]), None, fields)
+                del document["distance"]
+                documents.append(document)
+        return documents
@@ -0,0 +1,163 @@
+from pymilvus import (
+    connections,
+    utility,
+    Collection,
+    CollectionSchema,
+    FieldSchema,
+    DataType,
+    AnnSearchRequest,
+    RRFRanker,
+    WeightedRanker
+)
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from typing import List, Dict, Any, Optional, Tuple
+from .config import (
+    INSERT_BATCH_SIZE,
+    MULTI_VECTOR_RANKER,
+    MULTI_VECTOR_WEIGHTS
+)
+from .index_tuning import build_index, build_scalar_indexes, built_index_params, field_leg, search_settings
+
+# Vector fields stored side by side in one collection, in search-leg order
+VECTOR_FIELDS = ["title_vector", "content_vector", "summary_vector"]
+
+# Scalar fields copied from each document, stored once instead of once per vector
+SCALAR_FIELDS = ["title", "content", "summary", "keywords", "category", "source", "metadata"]
+
+class MultiVectorStore:
+    """Single Milvus collection holding the title, content and summary vectors of every document"""
+    
+    def __init__(self, collection_name: str, connection_args: Dict[str, Any], alias: str = "default"):
+        self.collection_name = collection_name
+        connections.connect(alias=alias, **connection_args)
+        self.col = Collection(collection_name, using=alias)
+        
+        # Search params follow the index each field was built with, tuned for the collection's size
+        num_entities = self.col.num_entities
+        self.search_params = {
+            field: search_settings(field_leg(field), built_index_params(self.col, field), num_entities)
+            for field in VECTOR_FIELDS
+        }
+    
+    @staticmethod
+    def _schema(dims: Dict[str, int]) -> CollectionSchema:
+        """Build the collection schema for the given vector dimensions"""
+        fields = [
+            FieldSchema("id", DataType.INT64, is_primary=True, auto_id=False),
+            FieldSchema("title", DataType.VARCHAR, max_length=1024),
+            FieldSchema("content", DataType.VARCHAR, max_length=65535),
+            FieldSchema("summary", DataType.VARCHAR, max_length=2048),
+            FieldSchema("keywords", DataType.VARCHAR, max_length=2048),
+            FieldSchema("category", DataType.INT64),
+            FieldSchema("source", DataType.VARCHAR, max_length=256),
+            FieldSchema("metadata", DataType.JSON)
+        ]
+        fields += [FieldSchema(name, DataType.FLOAT_VECTOR, dim=dims[name]) for name in VECTOR_FIELDS]
+        return CollectionSchema(fields, description="News articles with one vector per embedding model")
+    
+    @classmethod
+    def create(
+        cls,
+        collection_name: str,
+        dims: List[int],
+        connection_args: Dict[str, Any],
+        alias: str = "default",
+        drop_old: bool = True
+    ) -> "MultiVectorStore":
+        """Create an empty collection, or reopen the existing one when drop_old is False"""
+        connections.connect(alias=alias, **connection_args)
+        if drop_old and utility.has_collection(collection_name, using=alias):
+            utility.drop_collection(collection_name, using=alias)
+        
+        if not utility.has_collection(collection_name, using=alias):
+            Collection(collection_name, cls._schema(dict(zip(VECTOR_FIELDS, dims))), using=alias)
+        return cls(collection_name, connection_args, alias)
+    
+    def insert(self, documents: List[Document], embeddings: List[Embeddings]):
+        """Embed documents with each model and insert them in batches"""
+        for i in range(0, len(documents), INSERT_BATCH_SIZE):
+            batch = documents[i:i + INSERT_BATCH_SIZE]
+            texts = [doc.page_content for doc in batch]
+            rows = [
+                {
+                    "id": doc.metadata["id"],
+                    "title": doc.metadata["title"],
+                    "content": doc.page_content,
+                    "summary": doc.metadata.get("summary", ""),
+                    "keywords": doc.metadata.get("keywords", ""),
+                    "category": doc.metadata["category"],
+                    "source": doc.metadata.get("source", ""),
+                    "metadata": doc.metadata.get("metadata", {})
+                }
+                for doc in batch
+            ]
+            
+            # Every model embeds the same text, matching the per-store collections
+            for field, field_embeddings in zip(VECTOR_FIELDS, embeddings):
+                for row, vector in zip(rows, field_embeddings.embed_documents(texts)):
+                    row[field] = vector
+            
+            self.col.insert(rows)
+    
+    def finalize(self):
+        """Index every vector field for the final collection size and load the collection for search"""
+        for field in VECTOR_FIELDS:
+            self.search_params[field] = build_index(self.col, field, field_leg(field))
+        build_scalar_indexes(self.col)
+        self.col.load()
+    
+    @classmethod
+    def from_documents(
+        cls,
+        documents: List[Document],
+        embeddings: List[Embeddings],
+        dims: List[int],
+        collection_name: str,
+        connection_args: Dict[str, Any],
+        alias: str = "default"
+    ) -> "MultiVectorStore":
+        """Create the collection, embed documents with each model and insert them in batches"""
+        store = cls.create(collection_name, dims, connection_args, alias)
+        store.insert(documents, embeddings)
+        store.finalize()
+        return store
+    
+    def _ranker(self):
+        """Build the server-side ranker that fuses the per-field results"""
+        if MULTI_VECTOR_RANKER == "weighted":
+            return WeightedRanker(*MULTI_VECTOR_WEIGHTS)
+        if MULTI_VECTOR_RANKER == "rrf":
+            return RRFRanker()
+        raise ValueError(f"Unknown multi-vector ranker: {MULTI_VECTOR_RANKER}")
+    
+    def hybrid_search(
+        self,
+        query_vectors: List[List[List[float]]],
+        k: int,
+        output_fields: Optional[List[str]] = None,
+        expr: Optional[str] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Search all vector fields for a list of queries in one request, fused server-side"""
+        # query_vectors holds one list of query embeddings per vector field, in VECTOR_FIELDS order
+        requests = [
+            AnnSearchRequest(vectors, field, self.search_params[field], limit=k, expr=expr)
+            for field, vectors in zip(VECTOR_FIELDS, query_vectors)
+        ]
+        output_fields = SCALAR_FIELDS if output_fields is None else output_fields
+        results = self.col.hybrid_search(requests, self._ranker(), limit=k, output_fields=output_fields)
+        
+        # Fused scores are similarities; report 1 - score so smaller stays better like per-store distances
+        return [
+            [(self._to_document(hit, output_fields), 1.0 - hit.distance) for hit in hits]
+            for hits in results
+        ]
+    
+    @staticmethod
+    def _to_document(hit, output_fields: List[str]) -> Document:
+        """Rebuild the LangChain document shape the rest of the manager expects"""
+        metadata = {"id": hit.id}
+        for field in output_fields:
+            if field != "content":
+                metadata[field] = hit.entity.get(field)
+        return Document(page_content=hit.entity.get("content") or "", metadata=metadata)
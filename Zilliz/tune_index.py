@@ -0,0 +1,146 @@
+from src.ground_truth import exact_knn, recall_at_k
+from src.local_index import LocalVectorIndex
+from src.encoders import load_encoder
+from src.index_tuning import sweep_grid, pareto_frontier, choose_setting, save_index_profile
+from src.config import (
+    GROUND_TRUTH_INDEX_PATH,
+    INDEX_PROFILE_PATH,
+    INDEX_TARGET_RECALL,
+    INDEX_TUNING_COLLECTION,
+    INSERT_BATCH_SIZE,
+    MILVUS_CONNECTION_ALIAS,
+    ZILLIZ_URI,
+    ZILLIZ_TOKEN,
+    TITLE_MODEL,
+    CONTENT_MODEL,
+    SUMMARY_MODEL
+)
+from pymilvus import connections, utility, Collection, CollectionSchema, FieldSchema, DataType
+from datasets import load_dataset
+import json
+import os
+import sys
+import time
+import numpy as np
+
+NUM_QUERIES = 200  # AG News test titles used as queries
+K = 10  # Recall is reported at this depth
+OUTPUT_PATH = "index_tuning_report.json"
+LEG_MODELS = {"title": TITLE_MODEL, "content": CONTENT_MODEL, "summary": SUMMARY_MODEL}
+
+def create_collection(vectors: np.ndarray) -> Collection:
+    """Insert vectors into a fresh scratch collection, using their row numbers as ids"""
+    if utility.has_collection(INDEX_TUNING_COLLECTION, using=MILVUS_CONNECTION_ALIAS):
+        utility.drop_collection(INDEX_TUNING_COLLECTION, using=MILVUS_CONNECTION_ALIAS)
+    
+    schema = CollectionSchema([
+        FieldSchema("id", DataType.INT64, is_primary=True, auto_id=False),
+        FieldSchema("vector", DataType.FLOAT_VECTOR, dim=vectors.shape[1])
+    ])
+    collection = Collection(INDEX_TUNING_COLLECTION, schema, using=MILVUS_CONNECTION_ALIAS)
+    for start in range(0, len(vectors), INSERT_BATCH_SIZE):
+        end = min(start + INSERT_BATCH_SIZE, len(vectors))
+        collection.insert([list(range(start, end)), vectors[start:end].tolist()])
+    collection.flush()
+    return collection
+
+def measure(collection: Collection, queries: np.ndarray, true_rows, search_params) -> dict:
+    """Run the queries one at a time, as the API does, and report recall and throughput"""
+    latencies, retrieved_rows = [], []
+    for query in queries:
+        start_time = time.perf_counter()
+        hits = collection.search([query.tolist()], "vector", search_params, limit=K)[0]
+        latencies.append(time.perf_counter() - start_time)
+        retrieved_rows.append([hit.id for hit in hits])
+    
+    return {
+        "recall": recall_at_k(retrieved_rows, true_rows, K),
+        "qps": len(queries) / sum(latencies),
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000
+    }
+
+def sweep(vectors: np.ndarray, queries: np.ndarray) -> dict:
+    """Build every candidate index over the vectors and measure each of its search settings"""
+    rows, _ = exact_knn(vectors, queries, K)
+    true_rows = rows.tolist()
+    
+    collection = create_collection(vectors)
+    points = []
+    try:
+        for index_params, search_grid in sweep_grid(len(vectors), K):
+            collection.release()
+            if collection.has_index():
+                collection.drop_index()
+            
+            start_time = time.perf_counter()
+            collection.create_index("vector", index_params)
+            utility.wait_for_index_building_complete(INDEX_TUNING_COLLECTION, using=MILVUS_CONNECTION_ALIAS)
+            build_time = time.perf_counter() - start_time
+            collection.load()
+            
+            for search_params in search_grid:
+                point = {
+                    "index_params": index_params,
+                    "search_params": search_params,
+                    "build_time_s": build_time,
+                    **measure(collection, queries, true_rows, search_params)
+                }
+                points.append(point)
+                print(
+                    f"  {index_params['index_type']} {index_params['params']} {search_params['params']}: "
+                    f"recall@{K}={point['recall']:.4f}, {point['qps']:.0f} QPS, p95 {point['p95_ms']:.2f}ms"
+                )
+    finally:
+        collection.drop()
+    
+    frontier = pareto_frontier(points)
+    return {
+        "num_vectors": len(vectors),
+        "points": points,
+        "frontier": frontier,
+        "chosen": choose_setting(frontier, INDEX_TARGET_RECALL)
+    }
+
+def main():
+    try:
+        # Usage: python tune_index.py [title|content|summary] [collection size ...]
+        leg = sys.argv[1] if len(sys.argv) > 1 else "content"
+        reference = LocalVectorIndex.load(os.path.join(GROUND_TRUTH_INDEX_PATH, leg))
+        sizes = [min(int(size), len(reference)) for size in sys.argv[2:]] or [len(reference)]
+        
+        queries = [text.split("\n", 1)[0] for text in load_dataset("ag_news", split=f"test[:{NUM_QUERIES}]")["text"]]
+        query_embeddings = np.asarray(load_encoder(LEG_MODELS[leg]).encode(queries), dtype=np.float32)
+        
+        connections.connect(alias=MILVUS_CONNECTION_ALIAS, uri=ZILLIZ_URI, token=ZILLIZ_TOKEN)
+        
+        report = {"leg": leg, "num_queries": len(queries), "k": K, "target_recall": INDEX_TARGET_RECALL, "sizes": []}
+        for size in sizes:
+            print(f"Sweeping index settings over {size} {leg} vectors...")
+            result = sweep(np.asarray(reference.vectors[:size], dtype=np.float32), query_embeddings)
+            report["sizes"].append(result)
+            
+            print("Recall/QPS Pareto frontier:")
+            for point in result["frontier"]:
+                print(
+                    f"  recall@{K}={point['recall']:.4f} {point['qps']:8.0f} QPS  "
+                    f"{point['index_params']['index_type']} {point['index_params']['params']} {point['search_params']['params']}"
+                )
+            
+            chosen = result["chosen"]
+            save_index_profile(leg, size, {
+                "index_params": chosen["index_params"],
+                "search_params": chosen["search_params"],
+                "recall": chosen["recall"],
+                "qps": chosen["qps"]
+            })
+            print(f"Chose {chosen['index_params']['index_type']} for {size} {leg} vectors; profile written to {INDEX_PROFILE_PATH}")
+        
+        with open(OUTPUT_PATH, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {OUTPUT_PATH}")
+        
+    except Exception as e:
+        print(f"Error during index tuning: {e}")
+
+if __name__ == "__main__":
+    main()